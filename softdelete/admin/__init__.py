@@ -6,5 +6,7 @@ __all__ = ['SoftDeleteObjectAdmin',
            'ChangeSetAdmin',
            'SoftDeleteObjectInline',
            'SoftDeleteObjectAdminForm',
+           'DeletedListFilter',
+           'ApproximateCountPaginator',
            ]
 
@@ -1,11 +1,71 @@
 from django.http import HttpResponse, Http404, HttpResponseRedirect
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
-from django.contrib import admin
-from django.db import models
+from django.core.paginator import Paginator
+from django.contrib import admin, messages
+from django.db import connections, models
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
 from softdelete.models import *
 from softdelete.admin.forms import *
+import datetime
+import json
 import logging
 
+class DeletedListFilter(admin.SimpleListFilter):
+    '''
+    Filter on deleted_at: live rows, deleted rows, or rows deleted within
+    the last ``recent_days`` days. Each choice maps to a single predicate
+    on deleted_at, which a LiveIndex or an index on deleted_at can serve.
+    '''
+    title = 'deleted'
+    parameter_name = 'deleted'
+    recent_days = (1, 7, 30)
+
+    def lookups(self, request, model_admin):
+        choices = [('live', 'Live'), ('deleted', 'Deleted')]
+        for days in self.recent_days:
+            choices.append((str(days), 'Deleted in the last %s day%s' % (
+                days, '' if days == 1 else 's')))
+        return choices
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value == 'live':
+            return queryset.filter(deleted_at__isnull=True)
+        if value == 'deleted':
+            return queryset.filter(deleted_at__isnull=False)
+        if value and value.isdigit():
+            since = timezone.now() - datetime.timedelta(days=int(value))
+            return queryset.filter(deleted_at__gte=since)
+        return queryset
+
+class ApproximateCountPaginator(Paginator):
+    '''
+    Paginator that, on PostgreSQL, counts at most ``threshold`` rows exactly
+    and past that uses the planner's row estimate, so huge tables are never
+    fully counted. The estimate can be off, so the last pages may then be
+    empty or out of reach. Other backends have no cheap estimate: every row
+    is counted there, as with the default paginator, so that every page
+    can be browsed.
+    '''
+    threshold = 10000
+
+    @cached_property
+    def count(self):
+        qs = self.object_list.order_by()
+        if connections[qs.db].vendor != 'postgresql':
+            return qs.count()
+        count = qs[:self.threshold + 1].count()
+        if count <= self.threshold:
+            return count
+        return max(count, self._estimate(qs))
+
+    def _estimate(self, qs):
+        plan = json.loads(qs.explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+
 class SoftDeleteObjectInline(admin.TabularInline):
     class Meta:
         exclude = ('deleted_at',)
@@ -28,15 +88,41 @@ class SoftDeleteObjectInline(admin.TabularInline):
 class SoftDeleteObjectAdmin(admin.ModelAdmin):
     form = SoftDeleteObjectAdminForm
     actions = ['delete_selected', 'soft_undelete']
+    list_filter = (DeletedListFilter,)
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+
+    # Selections larger than this are handed to the callable named by the
+    # SOFTDELETE_ADMIN_BACKGROUND_HANDLER setting as
+    # handler(action, queryset) with action 'delete' or 'undelete'. The
+    # default queues softdelete.jobs jobs; set it to None to run every
+    # selection in the request.
+    background_threshold = 1000
+
+    def run_bulk_action(self, request, queryset, action):
+        handler = getattr(settings, 'SOFTDELETE_ADMIN_BACKGROUND_HANDLER',
+                          'softdelete.jobs.admin_background_handler')
+        if handler and queryset.count() > self.background_threshold:
+            import_string(handler)(action, queryset)
+            self.message_user(request, 'The selected objects are being %sd '
+                              'in the background.' % action, messages.INFO)
+        elif action == 'delete':
+            queryset.delete(bulk=True)
+        else:
+            queryset.undelete(bulk=True)
 
     def delete_selected(self, request, queryset):
-        queryset.delete()
+        self.run_bulk_action(request, queryset, 'delete')
     delete_selected.short_description = 'Soft delete selected objects'
 
     def soft_undelete(self, request, queryset):
-        queryset.undelete()
+        self.run_bulk_action(request, queryset, 'undelete')
     soft_undelete.short_description = 'Undelete selected objects'
 
+    def get_ordering(self, request):
+        return (super(SoftDeleteObjectAdmin, self).get_ordering(request)
+                or self.model._meta.ordering or ('-pk',))
+
     def response_change(self, request, obj, *args, **kwargs):
         if 'undelete' in request.POST:
             return HttpResponseRedirect('../')
@@ -61,11 +147,17 @@ class SoftDeleteRecordInline(admin.TabularInline):
     exclude = ('content_type', 'object_id',)
     readonly_fields = ('content',)
 
+    def get_queryset(self, request):
+        return super(SoftDeleteRecordInline, self).get_queryset(request).with_content()
+
 class SoftDeleteRecordAdmin(admin.ModelAdmin):
     model = SoftDeleteRecord
     form = SoftDeleteRecordAdminForm
     actions = ['soft_undelete']
 
+    def get_queryset(self, request):
+        return super(SoftDeleteRecordAdmin, self).get_queryset(request).with_content()
+
     def soft_undelete(self, request, queryset):
         [x.undelete() for x in queryset.all()]
     soft_undelete.short_description = 'Undelete selected objects'
@@ -88,6 +180,10 @@ class ChangeSetAdmin(admin.ModelAdmin):
     form = ChangeSetAdminForm
     inlines = (SoftDeleteRecordInline,)
     actions = ['soft_undelete']
+    list_display = ('__str__', 'record_count', 'status')
+
+    def get_queryset(self, request):
+        return super(ChangeSetAdmin, self).get_queryset(request).with_content()
 
     def soft_undelete(self, request, queryset):
         [x.undelete() for x in queryset.all()]
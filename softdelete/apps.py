@@ -0,0 +1,15 @@
+from django.apps import AppConfig
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class SoftDeleteConfig(AppConfig):
+    name = 'softdelete'
+
+    def ready(self):
+        from softdelete import checks  # noqa: registers the system checks
+        from softdelete.cascade import build_cascade_relations
+        build_cascade_relations()
+        from softdelete.instrumentation import add_listener
+        for path in getattr(settings, 'SOFTDELETE_STATS_LISTENERS', ()):
+            add_listener(import_string(path))
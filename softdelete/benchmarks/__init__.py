@@ -0,0 +1,33 @@
+'''
+Benchmarks for soft delete, cascade, undelete and purge, run on generated
+trees of the test_softdelete_app models:
+
+    python -m softdelete.benchmarks --sizes 10,1000,100000 --output bench.json
+
+See ``python -m softdelete.benchmarks --help`` for the options.
+'''
+
+def compare(results, baseline, tolerance=0.25):
+    '''
+    Compare ``results`` to the ``baseline`` results of an earlier run and
+    return a description of every regression: more queries than the
+    baseline, or wall time or peak memory more than ``tolerance`` above it.
+    '''
+    previous = dict(((r['scenario'], r['size'], r['backend']), r)
+                    for r in baseline)
+    regressions = []
+    for result in results:
+        key = (result['scenario'], result['size'], result['backend'])
+        if key not in previous:
+            continue
+        before = previous[key]
+        if result['queries'] > before['queries']:
+            regressions.append('%s/%s/%s: %s queries, was %s' % (
+                key + (result['queries'], before['queries'])))
+        for field in ('seconds', 'peak_memory'):
+            if result[field] is None or before[field] is None:
+                continue
+            if result[field] > before[field] * (1 + tolerance):
+                regressions.append('%s/%s/%s: %s %s, was %s' % (
+                    key + (field, result[field], before[field])))
+    return regressions
@@ -0,0 +1,119 @@
+from __future__ import print_function, unicode_literals
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from softdelete.benchmarks import compare
+
+BACKENDS = ('sqlite', 'postgres')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m softdelete.benchmarks',
+        description='Benchmark soft delete, cascade, undelete and purge.')
+    parser.add_argument(
+        '--sizes', default='10,100,1000,10000',
+        help='Comma separated numbers of rows per scenario, from 10 up to '
+             '1000000.')
+    parser.add_argument(
+        '--scenarios', default='',
+        help='Comma separated scenarios to run; all of them by default.')
+    parser.add_argument(
+        '--backend', choices=BACKENDS + ('all',), default='all',
+        help='Database to run on. "all" runs on SQLite, and on PostgreSQL '
+             'if one can be reached through the PG* environment variables.')
+    parser.add_argument(
+        '--no-memory', action='store_true',
+        help='Do not measure peak memory, which runs every scenario twice.')
+    parser.add_argument(
+        '--output', default='-',
+        help='File to write the JSON report to; standard output by default.')
+    parser.add_argument(
+        '--compare', metavar='BASELINE',
+        help='JSON report of an earlier run; exit with status 1 on '
+             'regressions.')
+    parser.add_argument(
+        '--tolerance', type=float, default=0.25,
+        help='Allowed relative increase of wall time and peak memory over '
+             'the baseline.')
+    return parser.parse_args(argv)
+
+
+def run_backend(options):
+    '''Run the benchmarks in this process, on ``options.backend``.'''
+    os.environ['SOFTDELETE_BENCH_BACKEND'] = options.backend
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'softdelete.benchmarks.settings'
+    import django
+    from django.core.exceptions import ImproperlyConfigured
+    from django.db import DatabaseError
+    try:
+        django.setup()
+        from django.db import connection
+        connection.ensure_connection()
+    except (ImproperlyConfigured, DatabaseError) as e:
+        print('%s is not available: %s' % (options.backend, e),
+              file=sys.stderr)
+        return []
+    from django.conf import settings
+    from django.core.management import call_command
+    from softdelete.benchmarks.scenarios import run_benchmarks
+
+    if connection.vendor == 'sqlite':
+        # Start from a fresh schema every time.
+        connection.close()
+        os.remove(settings.DATABASES['default']['NAME'])
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+    def progress(result):
+        print('%(backend)s %(scenario)s %(size)s: %(seconds).3fs, '
+              '%(queries)s queries, peak memory %(peak_memory)s' % result,
+              file=sys.stderr)
+    return run_benchmarks(
+        [int(size) for size in options.sizes.split(',')],
+        [name for name in options.scenarios.split(',') if name],
+        memory=not options.no_memory, progress=progress)
+
+
+def run_subprocess(options, backend):
+    command = [sys.executable, '-m', 'softdelete.benchmarks',
+               '--backend', backend, '--sizes', options.sizes,
+               '--scenarios', options.scenarios, '--output', '-']
+    if options.no_memory:
+        command.append('--no-memory')
+    output = subprocess.check_output(command)
+    return json.loads(output.decode('utf-8'))
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    if options.backend == 'all':
+        # Each backend needs its own settings, hence its own process.
+        results = []
+        for backend in BACKENDS:
+            results.extend(run_subprocess(options, backend))
+    else:
+        results = run_backend(options)
+
+    report = json.dumps(results, indent=2)
+    if options.output == '-':
+        print(report)
+    else:
+        with open(options.output, 'w') as f:
+            f.write(report + '\n')
+
+    if options.compare:
+        with open(options.compare) as f:
+            regressions = compare(results, json.load(f), options.tolerance)
+        for regression in regressions:
+            print('REGRESSION %s' % regression, file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
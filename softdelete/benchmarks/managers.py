@@ -0,0 +1,87 @@
+'''
+Micro-benchmark of the per-call overhead of SoftDeleteManager against a
+plain models.Manager on the same model, for the calls every request makes:
+
+    python -m softdelete.benchmarks.managers --number 10000
+
+Nothing is written to the database; get() reads one row.
+'''
+from __future__ import print_function, unicode_literals
+
+from collections import OrderedDict
+import argparse
+import json
+import os
+import sys
+import timeit
+
+# Calls measured on each manager, by name.
+OPERATIONS = OrderedDict([
+    ('all', lambda manager, pk: manager.all()),
+    ('filter', lambda manager, pk: manager.filter(extra_bool=True)),
+    ('chained_filter', lambda manager, pk: manager.filter(
+        extra_bool=True).filter(pk__gt=0).exclude(pk=pk)),
+    ('compile', lambda manager, pk: manager.filter(
+        extra_bool=True).query.sql_with_params()),
+    ('get', lambda manager, pk: manager.get(pk=pk)),
+])
+
+
+def measure_managers(number=10000, repeat=3):
+    '''
+    Time every operation of OPERATIONS ``number`` times, best of
+    ``repeat``, on TestModelOne._base_manager, a plain models.Manager, and
+    on TestModelOne.objects, and return the time per call in microseconds.
+    '''
+    from softdelete.test_softdelete_app.models import TestModelOne
+
+    obj = TestModelOne.objects.create()
+    managers = OrderedDict([
+        ('plain', TestModelOne._base_manager),
+        ('softdelete', TestModelOne.objects),
+    ])
+    results = []
+    try:
+        for name, operation in OPERATIONS.items():
+            for label, manager in managers.items():
+                seconds = min(timeit.repeat(
+                    lambda: operation(manager, obj.pk),
+                    number=number, repeat=repeat))
+                results.append(OrderedDict([
+                    ('operation', name),
+                    ('manager', label),
+                    ('microseconds', round(seconds / number * 1e6, 3)),
+                ]))
+    finally:
+        TestModelOne._base_manager.filter(pk=obj.pk).delete()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m softdelete.benchmarks.managers',
+        description='Measure the per-call overhead of SoftDeleteManager.')
+    parser.add_argument('--number', type=int, default=10000,
+                        help='Calls per measurement.')
+    options = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE',
+                          'softdelete.benchmarks.settings')
+    import django
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+    results = measure_managers(options.number)
+    for plain, softdelete in zip(results[::2], results[1::2]):
+        print('%-15s plain %8.3fus  softdelete %8.3fus  (x%.2f)' % (
+            plain['operation'], plain['microseconds'],
+            softdelete['microseconds'],
+            softdelete['microseconds'] / plain['microseconds']),
+            file=sys.stderr)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
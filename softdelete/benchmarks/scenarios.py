@@ -0,0 +1,232 @@
+'''
+Benchmark scenarios. Every scenario builds its data with setup(size), which
+is not measured, then run() is measured for wall time, number of queries
+and peak memory allocated by Python.
+'''
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+import datetime
+import gc
+import time
+import tracemalloc
+
+from django.contrib import admin
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import RequestFactory
+from django.utils import timezone
+
+from softdelete.admin import SoftDeleteObjectAdmin
+from softdelete.cascade import CASCADE_SUBQUERY
+from softdelete.models import ChangeSet, SoftDeleteRecord
+from softdelete.purge import purge_deleted
+from softdelete.test_softdelete_app.models import (
+    TestModelOne,
+    TestModelTwo,
+    TestModelThree,
+    TestModelThrough,
+    TestModelSafeDeleteCascade,
+    TestModelSoftDelete,
+    TestModelDefault,
+    TestModelSoftDeleteOnRelationLevelParent,
+    TestModelSoftDeleteOnRelationLevelChild,
+    TestModelSoftDeleteOnRelationLevelSecondChild,
+    TestModelSoftDeleteOnRelationLevelChildSetNull,
+    TestModelOneToOneRelationWithNonSoftDeleteObject,
+)
+
+BATCH_SIZE = 5000
+
+# Children before parents, so the tables can be emptied in this order.
+MODELS = (
+    SoftDeleteRecord,
+    ChangeSet,
+    TestModelThrough,
+    TestModelTwo,
+    TestModelThree,
+    TestModelOne,
+    TestModelDefault,
+    TestModelSoftDelete,
+    TestModelSafeDeleteCascade,
+    TestModelOneToOneRelationWithNonSoftDeleteObject,
+    TestModelSoftDeleteOnRelationLevelChildSetNull,
+    TestModelSoftDeleteOnRelationLevelSecondChild,
+    TestModelSoftDeleteOnRelationLevelChild,
+    TestModelSoftDeleteOnRelationLevelParent,
+)
+
+
+def reset():
+    '''Empty the tables of every benchmarked model.'''
+    for model in MODELS:
+        model._base_manager.all()._raw_delete(connection.alias)
+
+
+def _create(model, objs):
+    model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+    return list(model._base_manager.order_by('pk').values_list('pk', flat=True))
+
+
+def build_tree(roots, fanout):
+    '''
+    Create ``roots`` TestModelOne objects, each with ``fanout`` TestModelTwo
+    children and ``fanout`` TestModelThree objects linked through
+    TestModelThrough: ``roots * (1 + 3 * fanout)`` rows. Returns the root
+    primary keys.
+    '''
+    root_pks = _create(TestModelOne, [TestModelOne() for x in range(roots)])
+    _create(TestModelTwo, [TestModelTwo(tmo_id=pk, extra_int=x)
+                           for pk in root_pks for x in range(fanout)])
+    three_pks = _create(TestModelThree, [TestModelThree()
+                                         for x in range(roots * fanout)])
+    _create(TestModelThrough, [
+        TestModelThrough(tmo1_id=root_pks[i // fanout], tmo3_id=pk)
+        for i, pk in enumerate(three_pks)])
+    return root_pks
+
+
+def build_policy_tree(parents):
+    '''
+    Create ``parents`` TestModelSoftDeleteOnRelationLevelParent objects,
+    each with one child per relation policy (DO_NOTHING, cascade, SET_NULL)
+    and a one-to-one object that is not a SoftDeleteObject: ``5 * parents``
+    rows. Returns the parent primary keys.
+    '''
+    parent_pks = _create(TestModelSoftDeleteOnRelationLevelParent, [
+        TestModelSoftDeleteOnRelationLevelParent(extra_int=x)
+        for x in range(parents)])
+    for model in (TestModelSoftDeleteOnRelationLevelChild,
+                  TestModelSoftDeleteOnRelationLevelSecondChild,
+                  TestModelSoftDeleteOnRelationLevelChildSetNull):
+        _create(model, [model(parent_id=pk) for pk in parent_pks])
+    _create(TestModelOneToOneRelationWithNonSoftDeleteObject, [
+        TestModelOneToOneRelationWithNonSoftDeleteObject(one_to_one_id=pk)
+        for pk in parent_pks])
+    return parent_pks
+
+
+def _forest(size):
+    # Roots of ten rows each: one TestModelOne and three of every child.
+    return build_tree(max(1, size // 10), 3)
+
+
+def _single_tree(size):
+    return build_tree(1, max(1, size // 3))
+
+
+def _deleted_single_tree(size):
+    TestModelOne.objects.get(pk=_single_tree(size)[0]).delete()
+
+
+def _admin_request():
+    return RequestFactory().post('/')
+
+
+class Scenario(object):
+    '''A named pair of setup(size) and run() callables.'''
+
+    def __init__(self, name, setup, run):
+        self.name = name
+        self.setup = setup
+        self.run = run
+
+
+SCENARIOS = OrderedDict((scenario.name, scenario) for scenario in [
+    Scenario('queryset_delete', _forest,
+             lambda: TestModelOne.objects.all().delete()),
+    Scenario('queryset_bulk_delete', _forest,
+             lambda: TestModelOne.objects.all().delete(bulk=True)),
+    Scenario('cascade_delete', _single_tree,
+             lambda: TestModelOne.objects.get().delete()),
+    Scenario('subquery_cascade_delete', _single_tree,
+             lambda: TestModelOne.objects.get().delete(
+                 cascade_executor=CASCADE_SUBQUERY)),
+    Scenario('policy_cascade_delete',
+             lambda size: build_policy_tree(max(1, size // 5)),
+             lambda: TestModelSoftDeleteOnRelationLevelParent.objects.all()
+             .delete(bulk=True)),
+    Scenario('changeset_undelete', _deleted_single_tree,
+             lambda: ChangeSet.objects.get().undelete()),
+    Scenario('changeset_bulk_undelete', _deleted_single_tree,
+             lambda: ChangeSet.objects.get().undelete(bulk=True)),
+    Scenario('hard_delete', _deleted_single_tree,
+             lambda: purge_deleted(
+                 TestModelOne,
+                 timezone.now() + datetime.timedelta(seconds=1))),
+    Scenario('admin_delete_selected', _forest,
+             lambda: SoftDeleteObjectAdmin(TestModelOne, admin.site)
+             .delete_selected(_admin_request(), TestModelOne.objects.all())),
+    Scenario('admin_undelete', lambda size: (
+        _forest(size), TestModelOne.objects.all().delete(bulk=True)),
+             lambda: SoftDeleteObjectAdmin(TestModelOne, admin.site)
+             .soft_undelete(_admin_request(),
+                            TestModelOne.objects.deleted_set())),
+])
+
+
+class QueryCounter(object):
+    '''Database execute wrapper counting the queries run through it.'''
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(scenario, size, memory=True):
+    '''
+    Run ``scenario`` on data of ``size`` rows and return its result. Peak
+    memory is measured in a second run, since tracing allocations slows
+    the code down.
+    '''
+    reset()
+    scenario.setup(size)
+    # Content types are looked up again in every run, so that query counts
+    # do not depend on the order scenarios run in.
+    ContentType.objects.clear_cache()
+    counter = QueryCounter()
+    gc.collect()
+    start = time.perf_counter()
+    with connection.execute_wrapper(counter):
+        scenario.run()
+    seconds = time.perf_counter() - start
+    result = OrderedDict([
+        ('scenario', scenario.name),
+        ('size', size),
+        ('backend', connection.vendor),
+        ('seconds', round(seconds, 6)),
+        ('queries', counter.count),
+        ('peak_memory', None),
+    ])
+    if memory:
+        reset()
+        scenario.setup(size)
+        ContentType.objects.clear_cache()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            scenario.run()
+            result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    reset()
+    return result
+
+
+def run_benchmarks(sizes, names=None, memory=True, progress=None):
+    '''
+    Measure every scenario in ``names`` (all of them by default) at every
+    size, calling ``progress(result)`` after each, and return the results.
+    '''
+    results = []
+    for name in names or SCENARIOS:
+        for size in sizes:
+            result = measure(SCENARIOS[name], size, memory=memory)
+            if progress is not None:
+                progress(result)
+            results.append(result)
+    return results
+
@@ -0,0 +1,31 @@
+'''
+Settings for the benchmarks. SOFTDELETE_BENCH_BACKEND selects SQLite (the
+default, in a temporary file) or PostgreSQL, configured from the standard
+PG* environment variables.
+'''
+import os
+import tempfile
+
+from softdelete.settings import *
+
+INSTALLED_APPS = INSTALLED_APPS + ['softdelete.test_softdelete_app']
+
+if os.environ.get('SOFTDELETE_BENCH_BACKEND') == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('PGDATABASE', 'softdelete_bench'),
+            'USER': os.environ.get('PGUSER', ''),
+            'PASSWORD': os.environ.get('PGPASSWORD', ''),
+            'HOST': os.environ.get('PGHOST', ''),
+            'PORT': os.environ.get('PGPORT', ''),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(tempfile.gettempdir(),
+                                 'softdelete_bench.sqlite3'),
+        }
+    }
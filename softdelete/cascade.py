@@ -0,0 +1,536 @@
+from __future__ import unicode_literals
+
+from collections import OrderedDict, namedtuple
+from types import MappingProxyType
+import asyncio
+import datetime
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, transaction
+from django.db.models import (CharField, DateTimeField, F, IntegerField, Q,
+                              Value)
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from softdelete import instrumentation
+from softdelete.models import (SoftDeleteObject, SoftDeleteRecord,
+                               SOFTDELETE_BULK_CHUNK_SIZE, _DELETE_SIGNALS,
+                               _bulk_soft_delete, _chunked, _count_records,
+                               _recorded_pks, _saves_instances,
+                               _typed_object_id_field)
+from softdelete.signals import post_bulk_soft_delete, pre_bulk_soft_delete
+
+# How cascades are executed: CASCADE_PLAN collects the primary keys of every
+# level in Python, CASCADE_SUBQUERY runs every level as set-based INSERT ...
+# SELECT and UPDATE statements that never bring the rows to Python.
+CASCADE_PLAN = 'plan'
+CASCADE_SUBQUERY = 'subquery'
+SOFTDELETE_CASCADE_EXECUTOR = getattr(settings, 'SOFTDELETE_CASCADE_EXECUTOR',
+                                      CASCADE_PLAN)
+
+
+# One reverse relation a soft delete may cascade through. ``policy`` is the
+# relation policy resolved from softdelete_relation_policy, defaulting to
+# SOFT_DELETE_CASCADE.
+CascadeRelation = namedtuple('CascadeRelation', [
+    'accessor_name',
+    'field_name',
+    'related_model',
+    'one_to_one',
+    'policy',
+    'is_softdelete',
+])
+
+_cascade_relations = {}
+
+# Read-only view of the cascade relations of every SoftDeleteObject model,
+# filled when the app registry is ready.
+cascade_relations = MappingProxyType(_cascade_relations)
+
+
+def _build_cascade_relations(model):
+    relations = []
+    for f in model._meta.get_fields():
+        if not ((f.one_to_many or f.one_to_one)
+                and f.auto_created and not f.concrete):
+            continue
+        accessor_name = f.get_accessor_name()
+        relations.append(CascadeRelation(
+            accessor_name=accessor_name,
+            field_name=f.field.name,
+            related_model=f.related_model,
+            one_to_one=f.one_to_one,
+            policy=model.softdelete_relation_policy.get(
+                accessor_name, SoftDeleteObject.SOFT_DELETE_CASCADE),
+            is_softdelete=issubclass(f.related_model, SoftDeleteObject),
+        ))
+    return tuple(relations)
+
+
+def get_cascade_relations(model):
+    '''
+    Return the cascade relations of ``model``, building and caching them
+    if the model was not known when the app registry became ready.
+    '''
+    try:
+        return _cascade_relations[model]
+    except KeyError:
+        relations = _cascade_relations[model] = _build_cascade_relations(model)
+        return relations
+
+
+def build_cascade_relations():
+    '''
+    Precompute the cascade relations of every installed SoftDeleteObject
+    model. Called from SoftDeleteConfig.ready().
+    '''
+    _cascade_relations.clear()
+    for model in apps.get_models():
+        if issubclass(model, SoftDeleteObject):
+            _cascade_relations[model] = _build_cascade_relations(model)
+
+
+def _cascades(policy):
+    return policy not in (SoftDeleteObject.DO_NOTHING,
+                          SoftDeleteObject.SET_NULL)
+
+
+def _soft_deletes(policy):
+    return policy in (SoftDeleteObject.SOFT_DELETE,
+                      SoftDeleteObject.SOFT_DELETE_CASCADE)
+
+
+def _model_policy(model, force_policy=None):
+    '''
+    The policy objects of ``model`` are deleted with: ``force_policy`` when
+    one is given, SOFT_DELETE included, else the model's own.
+    '''
+    if force_policy is not None:
+        return force_policy
+    return model.softdelete_policy
+
+
+def _relation_policy(relation, force_policy=None):
+    if force_policy is not None:
+        return force_policy
+    return relation.policy
+
+
+def _cascades_to(relation, force_policy=None):
+    '''
+    Whether a soft delete cascading through ``relation`` soft deletes the
+    related objects: the relation cascades, and the related model's policy
+    soft deletes, as calling delete() on each of them would.
+    '''
+    return (relation.is_softdelete
+            and _cascades(_relation_policy(relation, force_policy))
+            and _soft_deletes(_model_policy(relation.related_model,
+                                            force_policy)))
+
+
+def reachable_models(models, force_policy=None):
+    '''
+    ``models`` and every SoftDeleteObject model a soft delete of theirs may
+    cascade to, in breadth first order.
+    '''
+    result = []
+    pending = [m._meta.concrete_model for m in models]
+    while pending:
+        model = pending.pop(0)
+        if model in result:
+            continue
+        result.append(model)
+        if (_model_policy(model, force_policy)
+                != SoftDeleteObject.SOFT_DELETE_CASCADE):
+            continue
+        for relation in get_cascade_relations(model):
+            if _cascades_to(relation, force_policy):
+                pending.append(relation.related_model._meta.concrete_model)
+    return result
+
+
+def dump_cascade_relations():
+    '''
+    Return the cascade relations as plain data, keyed by model label, for
+    inspection or serialization.
+    '''
+    names = dict((value, key) for key, value in
+                 SoftDeleteObject.__dict__.items()
+                 if key.isupper() and isinstance(value, int))
+    return dict(
+        (model._meta.label, [
+            dict(relation._asdict(),
+                 related_model=relation.related_model._meta.label,
+                 policy=names.get(relation.policy, relation.policy))
+            for relation in relations
+        ])
+        for model, relations in _cascade_relations.items()
+    )
+
+
+class CascadePlan(object):
+    '''
+    The set of objects affected by soft deleting ``pks`` of ``model``.
+
+    The graph is walked breadth first: every level is a mapping of model to
+    the primary keys reached at that depth, and each relation of a level is
+    resolved with one query per chunk of parent keys, instead of one query
+    per parent object. Relations whose policy is SET_NULL, and relations
+    pointing at models that are not SoftDeleteObjects, are recorded so they
+    can be applied as a single UPDATE or DELETE per relation.
+
+    Only live objects are collected, unless ``changeset`` is given: objects
+    already recorded in it are then walked through as well, so that an
+    interrupted cascade can be planned and executed again to completion.
+    '''
+
+    def __init__(self, model, pks, force_policy=None, using='default',
+                 chunk_size=None, changeset=None):
+        self.model = model
+        self.force_policy = force_policy
+        self.using = using
+        self.changeset = changeset
+        self.chunk_size = chunk_size or SOFTDELETE_BULK_CHUNK_SIZE
+        self.levels = [OrderedDict([(model, list(pks))])]
+        self.set_null = []
+        self.hard_delete = []
+        self._seen = {model: set(self.levels[0][model])}
+        self._collect()
+
+    def _policy(self, model):
+        return _model_policy(model, self.force_policy)
+
+    def _relation_policy(self, relation):
+        return _relation_policy(relation, self.force_policy)
+
+    def _collect(self):
+        level = self.levels[0]
+        while level:
+            next_level = OrderedDict()
+            for model, pks in level.items():
+                if self._policy(model) != SoftDeleteObject.SOFT_DELETE_CASCADE:
+                    continue
+                for relation in get_cascade_relations(model):
+                    self._collect_relation(relation, pks, next_level)
+            if next_level:
+                self.levels.append(next_level)
+            level = next_level
+
+    def _collect_relation(self, relation, pks, next_level):
+        relation_policy = self._relation_policy(relation)
+        if relation_policy == SoftDeleteObject.DO_NOTHING:
+            return
+        related_model = relation.related_model
+        if relation_policy == SoftDeleteObject.SET_NULL:
+            self.set_null.append((related_model, relation.field_name, pks))
+            return
+        if not relation.is_softdelete:
+            self.hard_delete.append((related_model, relation.field_name, pks))
+            return
+        if not _soft_deletes(self._policy(related_model)):
+            return
+
+        seen = self._seen.setdefault(related_model, set())
+        manager = related_model._base_manager.using(self.using)
+        affected = Q(deleted_at__isnull=True)
+        if self.changeset is not None:
+            affected |= Q(pk__in=_recorded_pks(self.changeset, related_model))
+        for chunk in _chunked(pks, self.chunk_size):
+            child_pks = manager.filter(
+                affected, **{'%s__in' % relation.field_name: chunk}
+            ).values_list('pk', flat=True)
+            for pk in child_pks:
+                if pk not in seen:
+                    seen.add(pk)
+                    next_level.setdefault(related_model, []).append(pk)
+
+    def __len__(self):
+        return sum(len(pks) for level in self.levels
+                   for pks in level.values())
+
+    def execute(self, changeset, signal_mode=None, include_roots=True,
+                on_chunk=None):
+        '''
+        Soft delete every planned object under ``changeset``, one model of
+        one level at a time, then apply the SET_NULL and hard delete
+        relations. ``on_chunk(model, pks)`` is called after every chunk.
+        '''
+        levels = self.levels if include_roots else self.levels[1:]
+        for depth, level in enumerate(levels, 0 if include_roots else 1):
+            for model, pks in level.items():
+                self._delete_level_model(depth, model, pks, changeset,
+                                         signal_mode, on_chunk)
+        self._apply_relations()
+
+    async def aexecute(self, changeset, signal_mode=None, include_roots=True,
+                       on_chunk=None):
+        '''
+        Async execute(). The models of one level do not depend on each
+        other, so they are soft deleted concurrently, each on its own
+        thread and database connection, when the database allows it: not
+        SQLite, and not inside an atomic block, whose writes the other
+        connections could not see. Levels still run one after the other.
+        '''
+        levels = self.levels if include_roots else self.levels[1:]
+        concurrent = await sync_to_async(self._can_run_concurrently)()
+        for depth, level in enumerate(levels, 0 if include_roots else 1):
+            if concurrent and len(level) > 1:
+                await asyncio.gather(*[
+                    sync_to_async(_in_own_connection, thread_sensitive=False)(
+                        self._delete_level_model, depth, model, pks,
+                        changeset, signal_mode, on_chunk)
+                    for model, pks in level.items()])
+            else:
+                for model, pks in level.items():
+                    await sync_to_async(self._delete_level_model)(
+                        depth, model, pks, changeset, signal_mode, on_chunk)
+        await sync_to_async(self._apply_relations)()
+
+    def _can_run_concurrently(self):
+        connection = connections[self.using]
+        return (connection.vendor != 'sqlite'
+                and not connection.in_atomic_block)
+
+    def _delete_level_model(self, depth, model, pks, changeset, signal_mode,
+                            on_chunk):
+        logging.debug("CASCADE LEVEL %s: %s objects of type %s",
+                      depth, len(pks), model)
+        stats = instrumentation.current()
+        if stats is not None:
+            start = time.perf_counter()
+        _bulk_soft_delete(model, pks, changeset, using=self.using,
+                          chunk_size=self.chunk_size,
+                          signal_mode=signal_mode, on_chunk=on_chunk)
+        if stats is not None:
+            stats.levels.append((depth, model._meta.label, len(pks),
+                                 time.perf_counter() - start))
+
+    def _apply_relations(self):
+        for model, field_name, pks in self.set_null:
+            for chunk in _chunked(pks, self.chunk_size):
+                instrumentation.count(model, model._default_manager.using(
+                    self.using).filter(**{'%s__in' % field_name: chunk}
+                                       ).update(**{field_name: None}))
+        for model, field_name, pks in self.hard_delete:
+            for chunk in _chunked(pks, self.chunk_size):
+                instrumentation.count(model, model._default_manager.using(
+                    self.using).filter(**{'%s__in' % field_name: chunk}
+                                       ).delete()[0])
+
+
+def _in_own_connection(func, *args):
+    try:
+        func(*args)
+    finally:
+        connections.close_all()
+
+
+class SubqueryCascade(object):
+    '''
+    Soft deletes ``pks`` of ``model`` and their cascade without reading the
+    affected rows into Python.
+
+    Every relation of every level costs one INSERT ... SELECT writing the
+    SoftDeleteRecord rows of the live children of the objects the previous
+    level soft deleted, then one UPDATE ... WHERE pk IN (SELECT ...)
+    stamping ``deleted_at`` on the rows just recorded. The records of every
+    level are written with a ``created_date`` of their own, which tells the
+    rows a level soft deleted apart from the other objects of the
+    changeset. SET_NULL and hard delete relations are applied with
+    subqueries the same way. Levels are executed until one soft deletes
+    nothing. No signal is sent, so cascade_executor() only picks it when
+    nothing would receive one.
+    '''
+
+    def __init__(self, model, pks, force_policy=None, using='default',
+                 chunk_size=None, changeset=None):
+        self.model = model
+        self.pks = list(pks)
+        self.force_policy = force_policy
+        self.using = using
+        self.chunk_size = chunk_size or SOFTDELETE_BULK_CHUNK_SIZE
+
+    def _policy(self, model):
+        return _model_policy(model, self.force_policy)
+
+    def _relation_policy(self, relation):
+        return _relation_policy(relation, self.force_policy)
+
+    def execute(self, changeset, signal_mode=None, include_roots=True,
+                on_chunk=None):
+        '''
+        Soft delete the roots, when ``include_roots``, then their cascade,
+        under ``changeset``. ``signal_mode`` and ``on_chunk`` are accepted
+        for compatibility with CascadePlan.execute() and ignored.
+        '''
+        now = timezone.now()
+        manager = self.model._base_manager.using(self.using)
+        if include_roots:
+            for chunk in _chunked(self.pks, self.chunk_size):
+                self._delete_rows(0, changeset, self.model, manager.filter(
+                    pk__in=chunk, deleted_at__isnull=True), now)
+        # Every level maps the models it soft deleted rows of to the sets of
+        # parents the next level cascades from: chunks of the roots first,
+        # then the rows recorded by that level.
+        level = OrderedDict([(self.model,
+                              list(_chunked(self.pks, self.chunk_size)))])
+        depth = 0
+        while level:
+            depth += 1
+            now = _next_stamp(now)
+            next_level = OrderedDict()
+            for model, parent_sets in level.items():
+                if self._policy(model) != SoftDeleteObject.SOFT_DELETE_CASCADE:
+                    continue
+                for relation in get_cascade_relations(model):
+                    for parents in parent_sets:
+                        related_model = self._apply_relation(
+                            depth, changeset, relation, parents, now)
+                        if related_model is not None:
+                            next_level[related_model] = [_recorded_pks(
+                                changeset, related_model, now)]
+            level = next_level
+
+    async def aexecute(self, changeset, signal_mode=None, include_roots=True,
+                       on_chunk=None):
+        '''Async execute().'''
+        await sync_to_async(self.execute)(changeset, signal_mode,
+                                          include_roots, on_chunk)
+
+    def _apply_relation(self, depth, changeset, relation, parents, now):
+        '''
+        Apply ``relation`` to the children of ``parents``. Returns the
+        related model when some of its rows were soft deleted.
+        '''
+        policy = self._relation_policy(relation)
+        if policy == SoftDeleteObject.DO_NOTHING:
+            return
+        related_model = relation.related_model
+        lookup = {'%s__in' % relation.field_name: parents}
+        if policy == SoftDeleteObject.SET_NULL:
+            instrumentation.count(related_model, related_model._default_manager
+                                  .using(self.using).filter(**lookup)
+                                  .update(**{relation.field_name: None}))
+            return
+        if not relation.is_softdelete:
+            instrumentation.count(related_model, related_model._default_manager
+                                  .using(self.using).filter(**lookup)
+                                  .delete()[0])
+            return
+        if not _soft_deletes(self._policy(related_model)):
+            return
+        children = related_model._base_manager.using(self.using).filter(
+            deleted_at__isnull=True, **lookup)
+        if self._delete_rows(depth, changeset, related_model, children, now):
+            return related_model
+
+    def _delete_rows(self, depth, changeset, model, rows, now):
+        '''
+        Record ``rows``, a queryset of live objects of ``model``, in
+        ``changeset`` and soft delete them, in one transaction. Returns the
+        number of objects soft deleted.
+        '''
+        stats = instrumentation.current()
+        start = time.perf_counter()
+        content_type = ContentType.objects.db_manager(
+            self.using).get_for_model(model)
+        with transaction.atomic(using=self.using):
+            recorded = _insert_records(changeset, model, content_type, rows,
+                                       now, self.using)
+            deleted = model._base_manager.using(self.using).filter(
+                deleted_at__isnull=True,
+                pk__in=_recorded_pks(changeset, model, now),
+            ).update(deleted_at=now)
+            _count_records(changeset, {content_type.pk: deleted}, self.using)
+        instrumentation.count(model, deleted, records=recorded,
+                              changeset=changeset)
+        logging.debug("CASCADE LEVEL %s: %s objects of type %s",
+                      depth, deleted, model)
+        if stats is not None and deleted:
+            stats.levels.append((depth, model._meta.label, deleted,
+                                 time.perf_counter() - start))
+        return deleted
+
+
+def _next_stamp(stamp):
+    '''The current time, or right after ``stamp`` when it is not later.'''
+    now = timezone.now()
+    if now > stamp:
+        return now
+    return stamp + datetime.timedelta(microseconds=1)
+
+
+def _insert_records(changeset, model, content_type, rows, now, using):
+    '''
+    Write the SoftDeleteRecord rows of the objects of ``rows`` not yet in
+    ``changeset`` with a single INSERT ... SELECT. Returns the number of
+    records written.
+    '''
+    columns = ['changeset', 'created_date', 'content_type', 'object_id']
+    values = rows.exclude(pk__in=_recorded_pks(changeset, model)).annotate(
+        softdelete_changeset=Value(changeset.pk, output_field=IntegerField()),
+        softdelete_created_date=Value(now, output_field=DateTimeField()),
+        softdelete_content_type=Value(content_type.pk,
+                                      output_field=IntegerField()),
+        softdelete_object_id=Cast('pk', output_field=CharField()),
+    )
+    typed = _typed_object_id_field(model)
+    if typed is not None:
+        columns.append(typed)
+        values = values.annotate(softdelete_typed_object_id=F('pk'))
+    values = values.values_list(*values.query.annotations)
+    sql, params = values.query.get_compiler(using).as_sql()
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute('INSERT INTO %s (%s) %s' % (
+            qn(SoftDeleteRecord._meta.db_table),
+            ', '.join(qn(SoftDeleteRecord._meta.get_field(name).column)
+                      for name in columns),
+            sql), params)
+        return cursor.rowcount
+
+
+def _subquery_supported(model, connection):
+    # object_id holds str(pk), which casting the primary key to text in SQL
+    # gives for integer and text keys, and for UUIDs on PostgreSQL only.
+    pk = model._meta.pk
+    while pk.is_relation:
+        pk = pk.target_field
+    if pk.get_internal_type() == 'UUIDField':
+        return connection.vendor == 'postgresql'
+    return pk.get_internal_type() in (
+        'AutoField', 'BigAutoField', 'SmallAutoField', 'IntegerField',
+        'BigIntegerField', 'SmallIntegerField', 'PositiveIntegerField',
+        'PositiveBigIntegerField', 'PositiveSmallIntegerField', 'CharField')
+
+
+def cascade_executor(model, pks, force_policy=None, using='default',
+                     chunk_size=None, changeset=None, executor=None):
+    '''
+    The executor of the soft delete of ``pks`` of ``model`` and of its
+    cascade. ``executor``, SOFTDELETE_CASCADE_EXECUTOR by default, picks a
+    SubqueryCascade with CASCADE_SUBQUERY, unless a model of the cascade
+    has delete signal receivers, objects that must be written with save(),
+    or a primary key that cannot be compared to object_id in SQL: a
+    CascadePlan is used then, as by default.
+    '''
+    executor = executor or SOFTDELETE_CASCADE_EXECUTOR
+    if executor == CASCADE_SUBQUERY:
+        signals = _DELETE_SIGNALS + (pre_bulk_soft_delete,
+                                     post_bulk_soft_delete)
+        connection = connections[using]
+        if not any(signal.has_listeners(m) or _saves_instances(m)
+                   or not _subquery_supported(m, connection)
+                   for m in reachable_models([model], force_policy)
+                   for signal in signals):
+            return SubqueryCascade(model, pks, force_policy=force_policy,
+                                   using=using, chunk_size=chunk_size,
+                                   changeset=changeset)
+    return CascadePlan(model, pks, force_policy=force_policy, using=using,
+                       chunk_size=chunk_size, changeset=changeset)
@@ -0,0 +1,46 @@
+from __future__ import unicode_literals
+
+from django.apps import apps
+from django.core.checks import Tags, Warning, register
+
+from softdelete.indexes import is_live_index
+from softdelete.models import SoftDeleteObject
+
+
+def _has_live_index(model, field_name):
+    for index in model._meta.indexes:
+        if not index.fields or index.fields[0].lstrip('-') != field_name:
+            continue
+        if is_live_index(index) or 'deleted_at' in index.fields:
+            return True
+    return False
+
+
+@register(Tags.models)
+def check_live_indexes(app_configs=None, **kwargs):
+    '''
+    Warn about fields listed in ``softdelete_lookup_fields`` that have no
+    index covering the "live rows" filter of SoftDeleteManager, either a
+    LiveIndex or a composite index that includes deleted_at.
+    '''
+    if app_configs is None:
+        models = apps.get_models()
+    else:
+        models = [m for app_config in app_configs
+                  for m in app_config.get_models()]
+    errors = []
+    for model in models:
+        if not issubclass(model, SoftDeleteObject):
+            continue
+        for field_name in model.softdelete_lookup_fields:
+            if _has_live_index(model, field_name):
+                continue
+            errors.append(Warning(
+                "'%s' is a softdelete lookup field but has no index over "
+                "live rows." % field_name,
+                hint="Add LiveIndex(fields=['%s']) from softdelete.indexes "
+                     "to Meta.indexes." % field_name,
+                obj=model,
+                id='softdelete.W001',
+            ))
+    return errors
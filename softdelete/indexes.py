@@ -0,0 +1,51 @@
+from __future__ import unicode_literals
+
+from django.db import models
+from django.db.models import Q
+
+# The predicate SoftDeleteManager adds to every default-manager query.
+LIVE_ROWS = Q(deleted_at__isnull=True)
+
+
+class LiveIndex(models.Index):
+    '''
+    A partial index over the rows that are not soft deleted, matching the
+    ``deleted_at IS NULL`` filter of SoftDeleteManager:
+
+        class Entry(SoftDeleteObject):
+            customer = models.ForeignKey(Customer, on_delete=models.CASCADE)
+
+            class Meta:
+                indexes = [LiveIndex(fields=['customer'])]
+
+    Unlike a plain conditional Index it does not need an explicit name; one
+    is generated from the model like for an unconditional index. Any
+    ``condition`` given is combined with the live-rows predicate. On
+    backends without partial index support the condition is ignored.
+    '''
+    suffix = 'liv'
+
+    def __init__(self, *args, **kwargs):
+        condition = kwargs.pop('condition', None)
+        super(LiveIndex, self).__init__(*args, **kwargs)
+        if condition is None:
+            condition = LIVE_ROWS
+        elif not _filters_live_rows(condition):
+            condition = condition & LIVE_ROWS
+        self.condition = condition
+
+    def deconstruct(self):
+        # Serialize as a plain Index so migrations don't import softdelete.
+        path, args, kwargs = super(LiveIndex, self).deconstruct()
+        return 'django.db.models.Index', args, kwargs
+
+
+def _filters_live_rows(condition):
+    return (condition.connector == Q.AND and not condition.negated
+            and ('deleted_at__isnull', True) in condition.children)
+
+
+def is_live_index(index):
+    '''Whether ``index`` only covers rows that are not soft deleted.'''
+    condition = getattr(index, 'condition', None)
+    return condition is not None and _filters_live_rows(condition)
@@ -0,0 +1,143 @@
+'''
+Instrumentation of soft delete operations.
+
+Every delete, undelete and purge is summarized in an OperationStats object:
+the objects touched per model, the records written or removed (the size of
+the changeset it affected), the queries issued and the time spent on each
+cascade level. The summary is passed to every callable added with
+add_listener(), or named in the SOFTDELETE_STATS_LISTENERS setting, and
+sent with the post_operation signal.
+
+Nothing is collected while nobody listens: entering an operation then
+costs one check, and every counting point one context variable lookup.
+Operations nested in another one, such as the per-object deletes of a
+queryset delete, are counted in the outer operation.
+'''
+from __future__ import unicode_literals
+
+from collections import Counter
+from contextlib import nullcontext
+from contextvars import ContextVar
+import logging
+import time
+
+from django.db import connections
+
+from softdelete.signals import post_operation
+
+_listeners = []
+_current = ContextVar('softdelete_operation_stats', default=None)
+_disabled = nullcontext()
+
+
+class OperationStats(object):
+    '''The summary of one delete, undelete or purge operation.'''
+
+    def __init__(self, operation, model, using='default', changeset=None):
+        self.operation = operation
+        self.model = model
+        self.using = using
+        self.changeset = changeset
+        # Objects soft deleted, undeleted or hard deleted, by model label.
+        self.objects = Counter()
+        # SoftDeleteRecord rows written or removed.
+        self.records = 0
+        self.queries = 0
+        # (depth, model label, objects, seconds) per model of every cascade
+        # level, depth 0 being the objects the operation started from.
+        self.levels = []
+        self.seconds = 0.0
+
+    def as_dict(self):
+        return {
+            'operation': self.operation,
+            'model': self.model._meta.label if self.model else None,
+            'changeset': self.changeset.pk if self.changeset else None,
+            'objects': dict(self.objects),
+            'records': self.records,
+            'queries': self.queries,
+            'levels': list(self.levels),
+            'seconds': self.seconds,
+        }
+
+    def __str__(self):
+        return '%s of %s: %s objects, %s records, %s queries in %.3fs' % (
+            self.operation, self.model._meta.label if self.model else None,
+            sum(self.objects.values()), self.records, self.queries,
+            self.seconds)
+
+
+def add_listener(callback):
+    '''Call ``callback(stats)`` at the end of every operation.'''
+    if callback not in _listeners:
+        _listeners.append(callback)
+
+
+def remove_listener(callback):
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+
+def log_stats(stats):
+    '''A listener logging every operation summary.'''
+    logging.info("SOFTDELETE %s", stats)
+
+
+class _Operation(object):
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.stats.queries += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.token = _current.set(self.stats)
+        self.wrapper = connections[self.stats.using].execute_wrapper(
+            self._count_query)
+        self.wrapper.__enter__()
+        self.start = time.perf_counter()
+        return self.stats
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stats.seconds = time.perf_counter() - self.start
+        self.wrapper.__exit__(exc_type, exc_value, traceback)
+        _current.reset(self.token)
+        if exc_type is None:
+            for callback in list(_listeners):
+                callback(self.stats)
+            post_operation.send(sender=self.stats.model, stats=self.stats)
+
+
+def operation(name, model, using='default', changeset=None):
+    '''
+    Context manager instrumenting the operation ``name`` (delete,
+    hard_delete, undelete or purge) of ``model``, or of the root of
+    ``changeset`` when ``model`` is None. It does nothing when nobody
+    listens, or inside another operation.
+    '''
+    if not (_listeners or post_operation.receivers) or _current.get():
+        return _disabled
+    if model is None and changeset is not None:
+        from django.contrib.contenttypes.models import ContentType
+        model = ContentType.objects.db_manager(using).get_for_id(
+            changeset.content_type_id).model_class()
+    return _Operation(OperationStats(name, model, using, changeset))
+
+
+def current():
+    '''The OperationStats being collected, or None.'''
+    return _current.get()
+
+
+def count(model=None, objects=0, records=0, changeset=None):
+    '''Add to the stats of the current operation, if any.'''
+    stats = _current.get()
+    if stats is None:
+        return
+    if model is not None:
+        stats.objects[model._meta.label] += objects
+    stats.records += records
+    if changeset is not None and stats.changeset is None:
+        stats.changeset = changeset
@@ -0,0 +1,198 @@
+'''
+Cascade deletes and undeletes run as background jobs.
+
+The job state lives on the ChangeSet: ``operation`` says what was queued,
+``status`` moves from pending to running to done (or failed), and
+``processed`` counts the objects handled by the current run. Every chunk is written in
+its own transaction and both operations are idempotent, so a job that died
+halfway is resumed by running it again; resume_jobs() does that for every
+unfinished changeset.
+
+The queue is pluggable through the SOFTDELETE_JOB_BACKEND setting, the
+dotted path of a class with an ``enqueue(func, *args)`` method.
+'''
+from __future__ import unicode_literals
+
+from concurrent import futures
+import logging
+
+import django
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils.module_loading import import_string
+
+from softdelete import instrumentation
+from softdelete.models import ChangeSet, _object_id_fields
+
+
+class ImmediateBackend(object):
+    '''Run jobs synchronously, as soon as they are enqueued.'''
+
+    def enqueue(self, func, *args):
+        func(*args)
+
+
+class LocalBackend(object):
+    '''
+    Keep jobs in memory until run_pending() is called. Meant for tests,
+    which can then run the queue, or drop it to simulate a crash.
+    '''
+
+    def __init__(self):
+        self.queue = []
+
+    def enqueue(self, func, *args):
+        self.queue.append((func, args))
+
+    def run_pending(self):
+        while self.queue:
+            func, args = self.queue.pop(0)
+            func(*args)
+
+
+class ThreadPoolBackend(object):
+    '''Run jobs on a pool of SOFTDELETE_JOB_WORKERS threads.'''
+    executor_class = futures.ThreadPoolExecutor
+
+    def __init__(self):
+        self.executor = self.executor_class(
+            max_workers=getattr(settings, 'SOFTDELETE_JOB_WORKERS', 4))
+
+    def enqueue(self, func, *args):
+        return self.executor.submit(_run_in_worker, func, *args)
+
+
+class ProcessPoolBackend(ThreadPoolBackend):
+    '''
+    Run jobs on a pool of worker processes, each of which sets Django up
+    from DJANGO_SETTINGS_MODULE when it starts.
+    '''
+    executor_class = futures.ProcessPoolExecutor
+
+    def __init__(self):
+        self.executor = self.executor_class(
+            max_workers=getattr(settings, 'SOFTDELETE_JOB_WORKERS', 4),
+            initializer=django.setup)
+
+
+def _run_in_worker(func, *args):
+    try:
+        func(*args)
+    finally:
+        connections.close_all()
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    path = getattr(settings, 'SOFTDELETE_JOB_BACKEND',
+                   'softdelete.jobs.ThreadPoolBackend')
+    if _backend is None or _backend[0] != path:
+        _backend = (path, import_string(path)())
+    return _backend[1]
+
+
+def _enqueue(changeset):
+    using = changeset._state.db or 'default'
+    transaction.on_commit(lambda: get_backend().enqueue(run_job, changeset.pk,
+                                                        using),
+                          using=using)
+
+
+def enqueue_delete(obj, using='default'):
+    '''
+    Queue a cascading soft delete of ``obj`` and return its ChangeSet,
+    marked pending. The object itself is deleted by the job.
+    '''
+    cs = ChangeSet.objects.using(using).create(
+        content_type=ContentType.objects.get_for_model(obj),
+        status=ChangeSet.STATUS_PENDING,
+        operation=ChangeSet.OPERATION_DELETE,
+        **_object_id_fields(obj.__class__, obj.pk))
+    _enqueue(cs)
+    return cs
+
+
+def enqueue_undelete(changeset):
+    '''Queue the undelete of ``changeset`` and mark it pending.'''
+    changeset.status = ChangeSet.STATUS_PENDING
+    changeset.operation = ChangeSet.OPERATION_UNDELETE
+    changeset.processed = 0
+    changeset.save(update_fields=['status', 'operation', 'processed'])
+    _enqueue(changeset)
+    return changeset
+
+
+def admin_background_handler(action, queryset):
+    '''
+    The default SOFTDELETE_ADMIN_BACKGROUND_HANDLER: queue a delete job for
+    every live object of ``queryset``, or an undelete job for every
+    ChangeSet holding one of its deleted objects. Deleted objects that
+    belong to no ChangeSet are undeleted right away.
+    '''
+    from softdelete.models import SOFTDELETE_BULK_CHUNK_SIZE, _bulk_undelete
+
+    using = queryset.db
+    if action == 'delete':
+        for obj in queryset.filter(deleted_at__isnull=True).only('pk'):
+            enqueue_delete(obj, using)
+        return
+    changesets, leftover = queryset._undelete_targets(
+        SOFTDELETE_BULK_CHUNK_SIZE)
+    for cs in changesets:
+        enqueue_undelete(cs)
+    if leftover:
+        _bulk_undelete(queryset.model, leftover, using=using)
+
+
+def resume_jobs(using='default', include_failed=False):
+    '''
+    Queue again every job that is pending, or was running when its worker
+    died, and failed jobs too if ``include_failed``. Returns the changesets.
+    '''
+    statuses = [ChangeSet.STATUS_PENDING, ChangeSet.STATUS_RUNNING]
+    if include_failed:
+        statuses.append(ChangeSet.STATUS_FAILED)
+    changesets = list(ChangeSet.objects.using(using).filter(
+        status__in=statuses).exclude(operation=''))
+    for cs in changesets:
+        _enqueue(cs)
+    return changesets
+
+
+def run_job(changeset_pk, using='default'):
+    '''Run, or resume, the job recorded on the changeset ``changeset_pk``.'''
+    from softdelete.cascade import CascadePlan
+
+    try:
+        cs = ChangeSet.objects.using(using).get(pk=changeset_pk)
+    except ChangeSet.DoesNotExist:
+        logging.debug("JOB FOR CHANGESET %s ALREADY FINISHED", changeset_pk)
+        return
+    if cs.status == ChangeSet.STATUS_DONE:
+        return
+    jobs = ChangeSet.objects.using(using).filter(pk=cs.pk)
+    jobs.update(status=ChangeSet.STATUS_RUNNING, processed=0)
+
+    def progress(model, pks):
+        jobs.update(processed=F('processed') + len(pks))
+
+    try:
+        with instrumentation.operation(cs.operation, None, using, cs):
+            if cs.operation == ChangeSet.OPERATION_DELETE:
+                model = cs.content_type.model_class()
+                root_pk = model._meta.pk.to_python(cs.object_id)
+                plan = CascadePlan(model, [root_pk], using=using,
+                                   changeset=cs)
+                plan.execute(cs, on_chunk=progress)
+                jobs.update(status=ChangeSet.STATUS_DONE)
+            else:
+                cs._bulk_undelete(using, None, None, on_chunk=progress)
+    except Exception:
+        jobs.update(status=ChangeSet.STATUS_FAILED)
+        raise
+    logging.debug("FINISHED JOB FOR CHANGESET %s", changeset_pk)
@@ -0,0 +1,50 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from softdelete.models import SoftDeleteObject, _object_id_column
+from softdelete.object_ids import backfill_object_ids
+
+
+class Command(BaseCommand):
+    help = ('Fill in the typed object id columns of existing '
+            'SoftDeleteRecord and ChangeSet rows.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*', metavar='app_label.ModelName',
+            help='Models whose rows to fill in. Defaults to every '
+                 'SoftDeleteObject model with an integer or UUID primary '
+                 'key.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=None,
+            help='Number of rows updated per query.')
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Database to update. Defaults to the "default" database.')
+
+    def get_models(self, labels):
+        if not labels:
+            return [m for m in apps.get_models()
+                    if issubclass(m, SoftDeleteObject)
+                    and _object_id_column(m) is not None]
+        models = []
+        for label in labels:
+            try:
+                model = apps.get_model(label)
+            except (LookupError, ValueError) as e:
+                raise CommandError(str(e))
+            if _object_id_column(model) is None:
+                raise CommandError('%s has no integer or UUID primary key.'
+                                   % label)
+            models.append(model)
+        return models
+
+    def handle(self, *args, **options):
+        for model in self.get_models(options['models']):
+            count = backfill_object_ids(model,
+                                        chunk_size=options['chunk_size'],
+                                        using=options['database'])
+            if options['verbosity'] > 0:
+                self.stdout.write('%s: %s rows filled in' % (
+                    model._meta.label, count))
@@ -0,0 +1,67 @@
+import datetime
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from softdelete.models import SoftDeleteObject
+from softdelete.purge import purge_deleted
+
+
+class Command(BaseCommand):
+    help = ('Hard delete objects that have been soft deleted for more than '
+            'a number of days, along with their changesets.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*', metavar='app_label.ModelName',
+            help='Models to purge. Defaults to every SoftDeleteObject model.')
+        parser.add_argument(
+            '--days', type=int, required=True,
+            help='Purge objects soft deleted more than this many days ago.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=None,
+            help='Number of objects hard deleted per transaction.')
+        parser.add_argument(
+            '--sleep', type=float, default=0,
+            help='Seconds to wait between chunks.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report how many objects would be purged.')
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Database to purge. Defaults to the "default" database.')
+
+    def get_models(self, labels):
+        if not labels:
+            return [m for m in apps.get_models()
+                    if issubclass(m, SoftDeleteObject)]
+        models = []
+        for label in labels:
+            try:
+                model = apps.get_model(label)
+            except (LookupError, ValueError) as e:
+                raise CommandError(str(e))
+            if not issubclass(model, SoftDeleteObject):
+                raise CommandError('%s is not a SoftDeleteObject.' % label)
+            models.append(model)
+        return models
+
+    def progress(self, model, purged):
+        if self.verbosity > 1:
+            self.stdout.write('  %s: %s purged' % (model._meta.label, purged))
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        older_than = datetime.timedelta(days=options['days'])
+        for model in self.get_models(options['models']):
+            count = purge_deleted(model, older_than,
+                                  chunk_size=options['chunk_size'],
+                                  sleep=options['sleep'],
+                                  dry_run=options['dry_run'],
+                                  using=options['database'],
+                                  progress=self.progress)
+            if self.verbosity > 0:
+                self.stdout.write('%s: %s %s' % (
+                    model._meta.label, count,
+                    'would be purged' if options['dry_run'] else 'purged'))
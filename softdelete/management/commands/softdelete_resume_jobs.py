@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from softdelete.jobs import resume_jobs
+
+
+class Command(BaseCommand):
+    help = 'Queue again the soft delete and undelete jobs that did not finish.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--include-failed', action='store_true',
+            help='Also retry jobs that failed.')
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Database to use. Defaults to the "default" database.')
+
+    def handle(self, *args, **options):
+        changesets = resume_jobs(using=options['database'],
+                                 include_failed=options['include_failed'])
+        if options['verbosity'] > 0:
+            self.stdout.write('%s job(s) queued' % len(changesets))
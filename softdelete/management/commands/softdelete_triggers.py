@@ -0,0 +1,65 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, NotSupportedError
+
+from softdelete.models import SoftDeleteObject
+from softdelete.triggers import (drop_trigger_sql, drop_triggers,
+                                 install_triggers, trigger_sql,
+                                 triggered_models)
+
+
+class Command(BaseCommand):
+    help = ('Install or drop the database triggers that turn DELETE '
+            'statements on SoftDeleteObject tables into soft deletes.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'action', choices=('install', 'drop'),
+            help='Install or drop the triggers.')
+        parser.add_argument(
+            'models', nargs='*', metavar='app_label.ModelName',
+            help='Models to act on, along with the models their cascades '
+                 'reach. Defaults to every SoftDeleteObject model.')
+        parser.add_argument(
+            '--sql', action='store_true',
+            help='Only print the SQL statements.')
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Database to use. Defaults to the "default" database.')
+
+    def get_models(self, labels):
+        if not labels:
+            return None
+        models = []
+        for label in labels:
+            try:
+                model = apps.get_model(label)
+            except (LookupError, ValueError) as e:
+                raise CommandError(str(e))
+            if not issubclass(model, SoftDeleteObject):
+                raise CommandError('%s is not a SoftDeleteObject.' % label)
+            models.append(model)
+        return models
+
+    def handle(self, *args, **options):
+        models = self.get_models(options['models'])
+        using = options['database']
+        install = options['action'] == 'install'
+        try:
+            if options['sql']:
+                sql = trigger_sql if install else drop_trigger_sql
+                for model in triggered_models(models):
+                    for statement in sql(model, using):
+                        self.stdout.write('%s;' % statement.strip())
+                return
+            if install:
+                models = install_triggers(models, using=using)
+            else:
+                models = drop_triggers(models, using=using)
+        except NotSupportedError as e:
+            raise CommandError(str(e))
+        if options['verbosity'] > 0:
+            for model in models:
+                self.stdout.write('%s: trigger %s' % (
+                    model._meta.label,
+                    'installed' if install else 'dropped'))
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-17 14:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('softdelete', '0002_auto_20170912_0537'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changeset',
+            name='operation',
+            field=models.CharField(blank=True, choices=[('delete', 'Delete'), ('undelete', 'Undelete')], default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='changeset',
+            name='processed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='changeset',
+            name='status',
+            field=models.CharField(choices=[('done', 'Done'), ('pending', 'Pending'), ('running', 'Running'), ('failed', 'Failed')], default='done', max_length=10),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.2.25 on 2026-10-17 15:07
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_records(apps, schema_editor):
+    ChangeSet = apps.get_model('softdelete', 'ChangeSet')
+    SoftDeleteRecord = apps.get_model('softdelete', 'SoftDeleteRecord')
+    db = schema_editor.connection.alias
+    counts = {}
+    for changeset_id, ct_id, count in SoftDeleteRecord.objects.using(
+            db).order_by().values('changeset_id', 'content_type_id').annotate(
+            count=Count('pk')).values_list(
+            'changeset_id', 'content_type_id', 'count'):
+        counts.setdefault(changeset_id, {})[str(ct_id)] = count
+    for changeset_id, by_type in counts.items():
+        ChangeSet.objects.using(db).filter(pk=changeset_id).update(
+            record_count=sum(by_type.values()), record_counts=by_type)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('softdelete', '0003_changeset_job_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changeset',
+            name='record_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='changeset',
+            name='record_counts',
+            field=models.JSONField(default=dict, editable=False),
+        ),
+        migrations.RunPython(count_records, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.2.25 on 2026-10-17 15:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('softdelete', '0004_changeset_record_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changeset',
+            name='object_id_int',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='changeset',
+            name='object_id_uuid',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='softdeleterecord',
+            name='object_id_int',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='softdeleterecord',
+            name='object_id_uuid',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='changeset',
+            index=models.Index(condition=models.Q(('object_id_int__isnull', False)), fields=['content_type', 'object_id_int'], name='sd_changeset_ct_int_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='changeset',
+            index=models.Index(condition=models.Q(('object_id_uuid__isnull', False)), fields=['content_type', 'object_id_uuid'], name='sd_changeset_ct_uuid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='softdeleterecord',
+            index=models.Index(condition=models.Q(('object_id_int__isnull', False)), fields=['content_type', 'object_id_int'], name='sd_record_ct_int_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='softdeleterecord',
+            index=models.Index(condition=models.Q(('object_id_uuid__isnull', False)), fields=['content_type', 'object_id_uuid'], name='sd_record_ct_uuid_idx'),
+        ),
+    ]
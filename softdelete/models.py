@@ -1,10 +1,10 @@
 from __future__ import unicode_literals
 
-import django
-
 from django.conf import settings
 from django.db.models import query
-from django.db import models
+from django.db.models.functions import Cast
+from django.db import models, router, transaction
+from django.db.models.deletion import Collector
 from django.core.exceptions import ObjectDoesNotExist
 from django.contrib.contenttypes.models import ContentType
 try:
@@ -13,7 +13,13 @@ except ImportError:
     from django.contrib.contenttypes.generic import GenericForeignKey
 from django.contrib.auth.models import Group, Permission
 from django.utils import timezone
+from asgiref.sync import sync_to_async
+from collections import Counter, OrderedDict
+from contextlib import ContextDecorator, nullcontext
+from contextvars import ContextVar
+import json
 import logging
+from softdelete import instrumentation
 from softdelete.signals import *
 
 try:
@@ -21,21 +27,294 @@ try:
 except:
     USE_SOFTDELETE_GROUP = False
 
+# Signal dispatch modes: the regular per-instance signals, a single
+# pre/post_bulk_soft_delete (or undelete) pair per chunk of objects, or the
+# bulk signals plus the per-instance ones only for models that have
+# receivers connected to them, so that objects are not loaded for nothing.
+SIGNALS_PER_OBJECT = 'object'
+SIGNALS_PER_BATCH = 'batch'
+SIGNALS_AUTO = 'auto'
+
+SOFTDELETE_BULK_CHUNK_SIZE = getattr(settings, 'SOFTDELETE_BULK_CHUNK_SIZE', 1000)
+SOFTDELETE_SIGNAL_MODE = getattr(settings, 'SOFTDELETE_SIGNAL_MODE',
+                                 SIGNALS_PER_OBJECT)
+
+# Every delete and undelete runs in a single transaction. With chunked
+# commits, each chunk of a bulk operation is committed on its own instead
+# (or gets its own savepoint inside a surrounding transaction), which keeps
+# lock hold times bounded on huge cascades. The ChangeSet then records
+# every chunk already written, so an interrupted cascade can be completed
+# the way softdelete.jobs resumes one.
+SOFTDELETE_CHUNKED_COMMIT = getattr(settings, 'SOFTDELETE_CHUNKED_COMMIT',
+                                    False)
+
+
+def _operation_atomic(using, chunked_commit=None):
+    '''
+    The transaction a whole delete or undelete runs in: one atomic block,
+    or none when its chunks are committed one by one.
+    '''
+    if chunked_commit is None:
+        chunked_commit = SOFTDELETE_CHUNKED_COMMIT
+    if chunked_commit:
+        return nullcontext()
+    return transaction.atomic(using=using)
+
+
+# Row locks a delete can take on the objects it is about to soft delete, so
+# that parallel deleters of overlapping graphs queue up behind each other
+# (LOCK_WAIT), fail at once (LOCK_NOWAIT), or leave the rows locked by
+# another deleter to it (LOCK_SKIP_LOCKED). No lock is taken on the roots by
+# default; cascaded rows are locked chunk by chunk, see _soft_delete_chunk().
+LOCK_WAIT = 'wait'
+LOCK_NOWAIT = 'nowait'
+LOCK_SKIP_LOCKED = 'skip_locked'
+SOFTDELETE_LOCK = getattr(settings, 'SOFTDELETE_LOCK', None)
+
+
+def _locked(queryset, lock=None):
+    '''
+    Return ``queryset`` selecting its rows for update as ``lock`` says,
+    or unchanged when no lock is asked for.
+    '''
+    lock = lock or SOFTDELETE_LOCK
+    if not lock:
+        return queryset
+    return queryset.select_for_update(nowait=lock == LOCK_NOWAIT,
+                                      skip_locked=lock == LOCK_SKIP_LOCKED)
+
+
+# Records and changesets store the primary key of their object as text in
+# object_id, which their generic foreign keys read. Objects of models with
+# an integer or UUID primary key can also have it stored in a typed column,
+# object_id_int or object_id_uuid, which lookups then use instead: its index
+# is narrower and it joins back to the objects without casts. Typed columns
+# are used for every model with SOFTDELETE_TYPED_OBJECT_IDS, or per model
+# with softdelete_typed_object_ids; the softdelete_backfill_object_ids
+# command fills them in on existing rows.
+SOFTDELETE_TYPED_OBJECT_IDS = getattr(settings, 'SOFTDELETE_TYPED_OBJECT_IDS',
+                                      False)
+
+_INTEGER_PK_TYPES = (
+    'AutoField', 'BigAutoField', 'SmallAutoField', 'IntegerField',
+    'BigIntegerField', 'SmallIntegerField', 'PositiveIntegerField',
+    'PositiveBigIntegerField', 'PositiveSmallIntegerField',
+)
+
+
+def _typed_object_id_field(model):
+    '''
+    The typed column holding the primary keys of objects of ``model`` in
+    records and changesets, or None when only object_id is used.
+    '''
+    enabled = getattr(model, 'softdelete_typed_object_ids', None)
+    if enabled is None:
+        enabled = SOFTDELETE_TYPED_OBJECT_IDS
+    if not enabled:
+        return None
+    return _object_id_column(model)
+
+
+def _object_id_column(model):
+    '''
+    The typed column that fits the primary key of ``model``, whether it is
+    enabled or not, or None.
+    '''
+    pk = model._meta.pk
+    while pk.is_relation:
+        pk = pk.target_field
+    internal_type = pk.get_internal_type()
+    if internal_type in _INTEGER_PK_TYPES:
+        return 'object_id_int'
+    if internal_type == 'UUIDField':
+        return 'object_id_uuid'
+    return None
+
+
+def _object_id_fields(model, pk):
+    '''
+    The field values identifying the object ``pk`` of ``model`` on a new
+    record or changeset.
+    '''
+    fields = {'object_id': str(pk)}
+    typed = _typed_object_id_field(model)
+    if typed is not None:
+        fields[typed] = model._meta.pk.to_python(pk)
+    return fields
+
+
+def _object_id_lookup(model, pks):
+    '''
+    Return the field to look up records and changesets of objects of
+    ``model`` by, and the values of ``pks`` for it.
+    '''
+    typed = _typed_object_id_field(model)
+    if typed is None:
+        return 'object_id', [str(pk) for pk in pks]
+    to_python = model._meta.pk.to_python
+    return typed, [to_python(pk) for pk in pks]
+
+
+def _add_record(changeset, obj):
+    '''
+    Record ``obj`` in ``changeset`` unless it already is, and return the
+    number of records written. The row is inserted ignoring conflicts, so
+    two deleters recording the same object do not fail on the unique
+    constraint.
+    '''
+    records = SoftDeleteRecord.objects.using(changeset._state.db or 'default')
+    content_type = ContentType.objects.get_for_model(obj)
+    fields = _object_id_fields(obj.__class__, obj.pk)
+    if records.filter(changeset=changeset, content_type=content_type,
+                      object_id=fields['object_id']).exists():
+        return 0
+    records.bulk_create(
+        [SoftDeleteRecord(changeset=changeset, content_type=content_type,
+                          **fields)],
+        ignore_conflicts=True)
+    return 1
+
+
+class _ChangeSetScope(object):
+    def __init__(self, changeset=None):
+        self.changeset = changeset
+        self.resolved = {}
+
+
+_changeset_scope = ContextVar('softdelete_changeset_scope', default=None)
+
+
+class changeset_context(ContextDecorator):
+    '''
+    Operation scoped changeset resolution, usable as a context manager or a
+    decorator. Inside the block every ChangeSet found or created for a
+    (content type, object id) pair is remembered, so each root object is
+    resolved once. If ``changeset`` is given, everything deleted inside the
+    block is recorded under it instead.
+
+        with changeset_context():
+            for obj in objs:
+                obj.delete()
+    '''
+
+    def __init__(self, changeset=None):
+        self.changeset = changeset
+        self._tokens = []
+
+    def _recreate_cm(self):
+        return self.__class__(self.changeset)
+
+    def __enter__(self):
+        scope = _ChangeSetScope(self.changeset)
+        self._tokens.append(_changeset_scope.set(scope))
+        return scope
+
+    def __exit__(self, *exc_info):
+        _changeset_scope.reset(self._tokens.pop())
+
+
+def _active_changeset():
+    scope = _changeset_scope.get()
+    if scope is not None:
+        return scope.changeset
+
+
+def _forget_change_set(changeset):
+    scope = _changeset_scope.get()
+    if scope is None:
+        return
+    for key, cs in list(scope.resolved.items()):
+        if cs is changeset or cs.pk == changeset.pk:
+            del scope.resolved[key]
+
+
+_signal_mode = ContextVar('softdelete_signal_mode', default=None)
+
+
+class signal_dispatch(ContextDecorator):
+    '''
+    Use the signal dispatch ``mode`` for every delete and undelete inside
+    the block, unless one is passed explicitly. Usable as a context manager
+    or a decorator.
+
+        with signal_dispatch(SIGNALS_PER_BATCH):
+            obj.delete()
+    '''
+
+    def __init__(self, mode):
+        self.mode = mode
+        self._tokens = []
+
+    def _recreate_cm(self):
+        return self.__class__(self.mode)
+
+    def __enter__(self):
+        self._tokens.append(_signal_mode.set(self.mode))
+
+    def __exit__(self, *exc_info):
+        _signal_mode.reset(self._tokens.pop())
+
+
+def _resolve_signal_mode(signal_mode=None):
+    return signal_mode or _signal_mode.get() or SOFTDELETE_SIGNAL_MODE
+
+
+_DELETE_SIGNALS = (models.signals.pre_delete, pre_soft_delete,
+                   models.signals.post_delete, post_soft_delete)
+_UNDELETE_SIGNALS = (pre_undelete, post_undelete)
+
+
+def _sends_instance_signals(signal_mode, model, signals):
+    if signal_mode == SIGNALS_AUTO:
+        return any(signal.has_listeners(model) for signal in signals)
+    return signal_mode == SIGNALS_PER_OBJECT
+
+
+def _saves_instances(model):
+    '''
+    Whether soft deleting or restoring objects of ``model`` in bulk must
+    go through save(): its write mode saves, and a save() override, save
+    signal receivers or auto_now fields would notice an UPDATE by primary
+    key instead.
+    '''
+    if model.softdelete_write_mode == SoftDeleteObject.WRITE_UPDATE:
+        return False
+    return (model.save is not SoftDeleteObject.save
+            or models.signals.pre_save.has_listeners(model)
+            or models.signals.post_save.has_listeners(model)
+            or any(getattr(f, 'auto_now', False)
+                   for f in model._meta.concrete_fields))
+
 
 def _determine_change_set(obj, create=True):
+    scope = _changeset_scope.get()
+    if scope is None:
+        return _lookup_change_set(obj, create)
+    if scope.changeset is not None:
+        return scope.changeset
+    key = (ContentType.objects.get_for_model(obj).pk, str(obj.pk))
+    cs = scope.resolved.get(key)
+    if cs is None or cs.pk is None:
+        cs = scope.resolved[key] = _lookup_change_set(obj, create)
+    return cs
+
+
+def _lookup_change_set(obj, create=True):
+    field, (object_id,) = _object_id_lookup(obj.__class__, [obj.pk])
+    lookup = {field: object_id}
     try:
         qs = SoftDeleteRecord.objects.filter(content_type=ContentType.objects.get_for_model(obj),
-                                             object_id=str(obj.pk)).latest('created_date').changeset
+                                             **lookup).latest('created_date').changeset
         logging.debug("Found changeset via latest recordset")
-    except:
+    except ObjectDoesNotExist:
         try:
             qs = ChangeSet.objects.filter(content_type=ContentType.objects.get_for_model(obj),
-                                          object_id=str(obj.pk)).latest('created_date')
+                                          **lookup).latest('created_date')
             logging.debug("Found changeset")
-        except:
+        except ObjectDoesNotExist:
             if create:
                 qs = ChangeSet.objects.create(content_type=ContentType.objects.get_for_model(obj),
-                                              object_id=str(obj.pk))
+                                              **_object_id_fields(obj.__class__, obj.pk))
                 logging.debug("Creating changeset")
             else:
                 logging.debug("Raising ObjectDoesNotExist")
@@ -43,88 +322,500 @@ def _determine_change_set(obj, create=True):
     return qs
 
 
-class SoftDeleteQuerySet(query.QuerySet):
-    def all_with_deleted(self):
-        qs = super(SoftDeleteQuerySet, self).all()
-        qs.__class__ = SoftDeleteQuerySet
-        return qs
-
-    def delete(self, using='default', *args, **kwargs):
-        if not len(self):
+def _chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _keyset_windows(queryset, chunk_size):
+    '''
+    Yield the rows of ``queryset`` in windows of at most ``chunk_size``, in
+    primary key order. Each window is read with ``pk > last pk seen``
+    rather than an offset, so it costs one indexed query however deep into
+    the table it is, and only one window is held in memory at a time.
+    ``queryset`` may be a values_list() starting with the primary key.
+    '''
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        window = queryset
+        if last_pk is not None:
+            window = queryset.filter(pk__gt=last_pk)
+        with transaction.atomic(using=queryset.db, savepoint=False):
+            rows = list(window[:chunk_size])
+        if not rows:
             return
-        cs = kwargs.get('changeset')
-        logging.debug("STARTING QUERYSET SOFT-DELETE: %s. %s", self, len(self))
-        for obj in self:
-            rs, c = SoftDeleteRecord.objects.get_or_create(changeset=cs or _determine_change_set(obj),
-                                                           content_type=ContentType.objects.get_for_model(obj),
-                                                           object_id=str(obj.pk))
-            logging.debug(" -----  CALLING delete() on %s", obj)
-            obj.delete(using, *args, **kwargs)
-
-    def undelete(self, using='default', *args, **kwargs):
-        logging.debug("UNDELETING %s", self)
-        for obj in self:
-            cs = _determine_change_set(obj)
-            cs.undelete()
-        logging.debug("FINISHED UNDELETING %s", self)
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        last_pk = rows[-1][0] if isinstance(rows[-1], tuple) else rows[-1].pk
+
+
+def _recorded_pks(changeset, model, created_date=None):
+    '''
+    Subquery of the primary keys of the objects of ``model`` recorded in
+    ``changeset``, only by the records created at ``created_date`` if it is
+    given: their typed object id column when the model has one, else
+    object_id cast to the type of the primary key.
+    '''
+    records = SoftDeleteRecord.objects.filter(
+        changeset=changeset,
+        content_type=ContentType.objects.get_for_model(model),
+    )
+    if created_date is not None:
+        records = records.filter(created_date=created_date)
+    typed = _typed_object_id_field(model)
+    if typed is not None:
+        return records.values(typed)
+    return records.annotate(
+        recorded_pk=Cast('object_id', output_field=model._meta.pk)
+    ).values('recorded_pk')
+
+
+def _bulk_soft_delete(model, pks, changeset, using='default', chunk_size=None,
+                      signal_mode=None, on_chunk=None):
+    '''
+    Soft delete the objects of ``model`` with the given primary keys, all
+    under ``changeset``. Each chunk costs one UPDATE for ``deleted_at``, or
+    a write per object for models whose write mode _saves_instances() says
+    must go through save(), and one bulk INSERT for the SoftDeleteRecord
+    rows, in one transaction, after which ``on_chunk(model, pks)`` is
+    called. Related objects are not touched; see softdelete.cascade for
+    that.
+    '''
+    chunk_size = chunk_size or SOFTDELETE_BULK_CHUNK_SIZE
+    signal_mode = _resolve_signal_mode(signal_mode)
+    per_object = _sends_instance_signals(signal_mode, model, _DELETE_SIGNALS)
+    content_type = ContentType.objects.get_for_model(model)
+    manager = model._base_manager.using(using)
+
+    for chunk in _chunked(pks, chunk_size):
+        with transaction.atomic(using=using):
+            _soft_delete_chunk(model, chunk, changeset, content_type, manager,
+                               using, signal_mode, per_object)
+            if on_chunk is not None:
+                on_chunk(model, chunk)
+
+
+def _soft_delete_chunk(model, chunk, changeset, content_type, manager, using,
+                       signal_mode, per_object):
+    # Only the rows still live are recorded and stamped, locked until the
+    # chunk commits: a row another deleter soft deleted since it was
+    # planned belongs to that deleter's changeset, and one recorded by an
+    # interrupted run of this delete already has its record.
+    live = _locked(manager.filter(pk__in=chunk, deleted_at__isnull=True),
+                   SOFTDELETE_LOCK or LOCK_WAIT)
+    saves = _saves_instances(model)
+    if per_object or saves:
+        instances = list(live)
+        pks = [obj.pk for obj in instances]
+    else:
+        pks = list(live.values_list('pk', flat=True))
+    if not pks:
+        return
+    if per_object:
+        for obj in instances:
+            models.signals.pre_delete.send(sender=model, instance=obj,
+                                           using=using)
+            pre_soft_delete.send(sender=model, instance=obj, using=using)
+    if signal_mode != SIGNALS_PER_OBJECT:
+        pre_bulk_soft_delete.send(sender=model, pks=pks,
+                                  changeset=changeset, using=using)
+
+    now = timezone.now()
+    SoftDeleteRecord.objects.using(using).bulk_create(
+        [SoftDeleteRecord(changeset=changeset,
+                          content_type=content_type,
+                          **_object_id_fields(model, pk)) for pk in pks],
+        ignore_conflicts=True)
+    if per_object or saves:
+        for obj in instances:
+            obj.deleted_at = now
+            if saves:
+                obj._write_deleted_at()
+    if saves:
+        deleted = len(instances)
+    else:
+        deleted = manager.filter(pk__in=pks).update(deleted_at=now)
+    _count_records(changeset, {content_type.pk: deleted}, using)
+    instrumentation.count(model, deleted, records=deleted,
+                          changeset=changeset)
+    logging.debug("BULK SOFT DELETED %s objects of type %s", deleted, model)
+
+    if per_object:
+        for obj in instances:
+            models.signals.post_delete.send(sender=model, instance=obj,
+                                            using=using)
+            post_soft_delete.send(sender=model, instance=obj, using=using)
+    if signal_mode != SIGNALS_PER_OBJECT:
+        post_bulk_soft_delete.send(sender=model, pks=pks,
+                                   changeset=changeset, using=using)
+
+
+def _bulk_undelete(model, pks, changeset=None, using='default',
+                    chunk_size=None, signal_mode=None):
+    '''
+    Clear ``deleted_at`` on the objects of ``model`` with the given primary
+    keys, with one UPDATE per chunk.
+    '''
+    chunk_size = chunk_size or SOFTDELETE_BULK_CHUNK_SIZE
+    signal_mode = _resolve_signal_mode(signal_mode)
+    per_object = _sends_instance_signals(signal_mode, model,
+                                         _UNDELETE_SIGNALS)
+    to_python = model._meta.pk.to_python
+    manager = model._base_manager.using(using)
+
+    for chunk in _chunked(pks, chunk_size):
+        chunk = [to_python(pk) for pk in chunk]
+        if per_object:
+            instances = list(manager.filter(pk__in=chunk))
+            for obj in instances:
+                pre_undelete.send(sender=model, instance=obj, using=using)
+        if signal_mode != SIGNALS_PER_OBJECT:
+            pre_bulk_undelete.send(sender=model, pks=chunk,
+                                   changeset=changeset, using=using)
+
+        manager.filter(pk__in=chunk).update(deleted_at=None)
+        instrumentation.count(model, len(chunk))
+        logging.debug("BULK UNDELETED %s objects of type %s",
+                      len(chunk), model)
+
+        if per_object:
+            for obj in instances:
+                obj.deleted_at = None
+                post_undelete.send(sender=model, instance=obj, using=using)
+        if signal_mode != SIGNALS_PER_OBJECT:
+            post_bulk_undelete.send(sender=model, pks=chunk,
+                                    changeset=changeset, using=using)
+
+
+def _update_record_counts(changeset_pk, deltas, using='default'):
+    '''
+    Add ``deltas``, a mapping of content type id to a number of records
+    added, or removed when negative, to the counters of the changeset
+    ``changeset_pk``. The row is locked while its breakdown by content type
+    is rewritten. Returns the new total and breakdown.
+    '''
+    rows = ChangeSet.objects.using(using).filter(pk=changeset_pk)
+    with transaction.atomic(using=using, savepoint=False):
+        counts = dict(rows.select_for_update().values_list(
+            'record_counts', flat=True).get())
+        for ct_id, delta in deltas.items():
+            key = str(ct_id)
+            counts[key] = counts.get(key, 0) + delta
+            if counts[key] <= 0:
+                del counts[key]
+        total = sum(counts.values())
+        rows.update(record_count=total, record_counts=counts)
+    return total, counts
+
+
+def _count_records(changeset, deltas, using='default'):
+    deltas = dict((ct_id, delta) for ct_id, delta in deltas.items() if delta)
+    if deltas:
+        changeset.record_count, changeset.record_counts = \
+            _update_record_counts(changeset.pk, deltas, using)
+
+
+def _remove_record_counts(removed, ct_id, using='default'):
+    '''
+    Take ``removed``, a mapping of changeset id to a number of records of
+    content type ``ct_id`` dropped from that changeset, off the counters of
+    those changesets. Their rows are read, locked, with one query and
+    rewritten with a single UPDATE.
+    '''
+    if not removed:
+        return
+    rows = ChangeSet.objects.using(using).filter(pk__in=list(removed))
+    key = str(ct_id)
+    totals = []
+    breakdowns = []
+    with transaction.atomic(using=using, savepoint=False):
+        for pk, counts in rows.select_for_update().values_list(
+                'pk', 'record_counts'):
+            counts = dict(counts)
+            counts[key] = counts.get(key, 0) - removed[pk]
+            if counts[key] <= 0:
+                del counts[key]
+            totals.append(models.When(pk=pk, then=models.Value(
+                sum(counts.values()))))
+            breakdowns.append(models.When(pk=pk, then=Cast(
+                models.Value(json.dumps(counts)),
+                output_field=models.JSONField())))
+        if totals:
+            rows.update(
+                record_count=models.Case(
+                    *totals, output_field=models.PositiveIntegerField()),
+                record_counts=models.Case(
+                    *breakdowns, output_field=models.JSONField()))
+
+
+def _purge_records(model, pks, using='default'):
+    '''
+    Drop the SoftDeleteRecord rows of objects of ``model`` that are about
+    to be hard deleted, then every ChangeSet left without records. A
+    ChangeSet still holding records of other objects is kept, so those can
+    be undeleted.
+    '''
+    content_type = ContentType.objects.get_for_model(model)
+    field, object_ids = _object_id_lookup(model, pks)
+    lookup = {'%s__in' % field: object_ids}
+    records = SoftDeleteRecord.objects.using(using).filter(
+        content_type=content_type, **lookup)
+    removed = Counter(records.values_list('changeset_id', flat=True))
+    changeset_ids = set(removed)
+    changeset_ids.update(ChangeSet.objects.using(using).filter(
+        content_type=content_type, **lookup
+    ).values_list('pk', flat=True))
+    instrumentation.count(records=records.delete()[0])
+    _remove_record_counts(removed, content_type.pk, using)
+    if changeset_ids:
+        ChangeSet.objects.using(using).filter(
+            pk__in=changeset_ids, record_count=0).delete()
+
+
+def _hard_delete(objs, using, keep_parents=False):
+    '''
+    Hard delete ``objs``, a queryset or a list of objects, the way
+    Model.delete() and QuerySet.delete() do. The SoftDeleteRecord rows of
+    every object the deletion collects, rows removed by on_delete cascades
+    included, are purged first, and so are the ChangeSets left empty. The
+    soft delete triggers, if installed, are bypassed.
+    '''
+    from softdelete.triggers import hard_deletes
+    collector = Collector(using=using)
+    collector.collect(objs, keep_parents=keep_parents)
+    for model, instances in collector.data.items():
+        if issubclass(model, SoftDeleteObject):
+            _purge_records(model, [obj.pk for obj in instances], using)
+    for qs in collector.fast_deletes:
+        model = getattr(qs, 'model', None)
+        if model is not None and issubclass(model, SoftDeleteObject):
+            for chunk in _chunked(qs.values_list('pk', flat=True).iterator(),
+                                  SOFTDELETE_BULK_CHUNK_SIZE):
+                _purge_records(model, chunk, using)
+    with hard_deletes(using):
+        return collector.delete()
 
 
-class SoftDeleteManager(models.Manager):
+class SoftDeleteQuerySet(query.QuerySet):
+    def all_with_deleted(self):
+        return self.all()
 
-    def _get_base_queryset(self):
+    def delete(self, using='default', *args, **kwargs):
+        bulk = kwargs.pop('bulk', False)
+        chunk_size = kwargs.pop('chunk_size', None)
+        signal_mode = kwargs.pop('signal_mode', None)
+        if self.query.is_sliced:
+            # Windows are read by primary key, which a slice cannot take.
+            return SoftDeleteQuerySet(self.model, using=self.db).filter(
+                pk__in=list(self.values_list('pk', flat=True))
+            ).delete(using, *args, bulk=bulk, chunk_size=chunk_size,
+                     signal_mode=signal_mode, **kwargs)
+        with instrumentation.operation('delete', self.model, self.db), \
+                _operation_atomic(self.db, kwargs.get('chunked_commit')):
+            if bulk:
+                kwargs.pop('chunked_commit', None)
+                return self._bulk_delete(using, chunk_size, signal_mode,
+                                         *args, **kwargs)
+            self._delete(using, chunk_size, *args, **kwargs)
+
+    def _delete(self, using, chunk_size, *args, **kwargs):
         '''
-        Convenience method for grabbing the base query set. Accounts for the
-        deprecation of get_query_set in Django 18.
+        Delete the objects of the queryset one by one, reading them in
+        windows of ``chunk_size``, each deleted in its own transaction (a
+        savepoint inside the transaction of the whole delete). Objects the
+        cascade of an earlier one soft deleted are skipped rather than
+        deleted again.
         '''
+        chunk_size = chunk_size or SOFTDELETE_BULK_CHUNK_SIZE
+        started = timezone.now()
+        logging.debug("STARTING QUERYSET SOFT-DELETE: %s", self)
+        for window in _keyset_windows(self, chunk_size):
+            with transaction.atomic(using=self.db):
+                for obj in window:
+                    if obj.deleted_at is not None and obj.deleted_at >= started:
+                        continue
+                    logging.debug(" -----  CALLING delete() on %s", obj)
+                    obj.delete(using, *args, **kwargs)
+
+    def _bulk_delete(self, using, chunk_size, signal_mode, *args, **kwargs):
+        '''
+        Soft delete every live object of the queryset under a single
+        ChangeSet, a window of objects and its cascade at a time. Objects
+        that are already soft deleted are hard deleted one by one, as in
+        the regular path.
+        '''
+        cs = None
+        for cs, plan in self._plan_bulk_delete(using, chunk_size, *args,
+                                               **kwargs):
+            plan.execute(cs, signal_mode=signal_mode)
+        return cs
 
-        if django.VERSION >= (1, 8, 0, 'final', 0):
-            return super(SoftDeleteManager, self).get_queryset()
-        else:
-            return super(SoftDeleteManager, self).get_query_set()
-
-    def _get_self_queryset(self):
+    def _plan_bulk_delete(self, using, chunk_size, *args, **kwargs):
+        '''
+        Yield the ChangeSet and the cascade executor of every window of
+        ``chunk_size`` objects of the queryset, read in primary key order.
+        A window is read once the plan of the previous one was executed, so
+        objects its cascade reached are not planned again.
+        '''
+        from softdelete.cascade import (_model_policy, _soft_deletes,
+                                        cascade_executor)
+        chunk_size = chunk_size or SOFTDELETE_BULK_CHUNK_SIZE
+        started = timezone.now()
+        # Live objects are left alone when their policy does not soft
+        # delete, as delete() on each of them would.
+        soft_deletes = _soft_deletes(_model_policy(
+            self.model, kwargs.get('force_policy')))
+        cs = kwargs.get('changeset') or _active_changeset()
+        rows = _locked(self, kwargs.get('lock')).values_list('pk', 'deleted_at')
+        for window in _keyset_windows(rows, chunk_size):
+            for pk, deleted_at in window:
+                if deleted_at is not None and deleted_at < started:
+                    self.model._base_manager.using(self.db).get(pk=pk).delete(
+                        using, *args, **kwargs)
+            pks = [pk for pk, deleted_at in window if deleted_at is None]
+            if not pks or not soft_deletes:
+                continue
+            if cs is None:
+                cs = ChangeSet.objects.using(self.db).create(
+                    content_type=ContentType.objects.get_for_model(self.model),
+                    **_object_id_fields(self.model, pks[0]))
+            plan = cascade_executor(self.model, pks,
+                                    force_policy=kwargs.get('force_policy'),
+                                    using=self.db, chunk_size=chunk_size,
+                                    executor=kwargs.get('cascade_executor'))
+            logging.debug("STARTING BULK QUERYSET SOFT-DELETE: %s objects",
+                          len(pks))
+            yield cs, plan
+
+    async def adelete(self, using='default', *args, **kwargs):
         '''
-        Convenience method for grabbing the query set. Accounts for the
-        deprecation of get_query_set in Django 18.
+        Async delete(). With ``bulk=True`` and chunked commits, the cascade
+        is executed with CascadePlan.aexecute().
         '''
+        if not (kwargs.get('bulk') and kwargs.get('chunked_commit',
+                                                  SOFTDELETE_CHUNKED_COMMIT)):
+            return await sync_to_async(self.delete)(using, *args, **kwargs)
+        kwargs.pop('bulk')
+        kwargs.pop('chunked_commit', None)
+        chunk_size = kwargs.pop('chunk_size', None)
+        signal_mode = kwargs.pop('signal_mode', None)
+        plans = self._plan_bulk_delete(using, chunk_size, *args, **kwargs)
+        cs = None
+        while True:
+            planned = await sync_to_async(next)(plans, None)
+            if planned is None:
+                return cs
+            cs, plan = planned
+            await plan.aexecute(cs, signal_mode=signal_mode)
 
-        if django.VERSION >= (1, 8, 0, 'final', 0):
-            return self.get_queryset()
-        else:
-            return self.get_query_set()
+    def undelete(self, using='default', *args, **kwargs):
+        chunked_commit = kwargs.pop('chunked_commit', None)
+        with instrumentation.operation('undelete', self.model, self.db), \
+                _operation_atomic(self.db, chunked_commit):
+            if kwargs.pop('bulk', False):
+                return self._bulk_undelete(using, *args,
+                                           chunked_commit=chunked_commit,
+                                           **kwargs)
+            logging.debug("UNDELETING %s", self)
+            for obj in self:
+                cs = _determine_change_set(obj)
+                cs.undelete(chunked_commit=chunked_commit)
+            logging.debug("FINISHED UNDELETING %s", self)
+
+    def _bulk_undelete(self, using, chunk_size=None, signal_mode=None,
+                       chunked_commit=None):
+        '''
+        Undelete every ChangeSet holding one of the objects of the queryset,
+        resolving the changesets with one query per chunk of objects.
+        Deleted objects that belong to no ChangeSet are undeleted directly.
+        '''
+        chunk_size = chunk_size or SOFTDELETE_BULK_CHUNK_SIZE
+        changesets, leftover = self._undelete_targets(chunk_size)
+        for cs in changesets:
+            cs.undelete(using, bulk=True, chunk_size=chunk_size,
+                        signal_mode=signal_mode,
+                        chunked_commit=chunked_commit)
+        if leftover:
+            _bulk_undelete(self.model, leftover, using=self.db,
+                           chunk_size=chunk_size, signal_mode=signal_mode)
+
+    def _undelete_targets(self, chunk_size):
+        '''
+        Return the ChangeSets holding one of the deleted objects of the
+        queryset, and the pks of the deleted objects that belong to none.
+        '''
+        content_type = ContentType.objects.get_for_model(self.model)
+        field, pks = _object_id_lookup(
+            self.model,
+            self.filter(deleted_at__isnull=False).values_list('pk', flat=True))
+        changeset_ids = set()
+        covered = set()
+        for chunk in _chunked(pks, chunk_size):
+            lookup = {'%s__in' % field: chunk}
+            for cs_id, object_id in SoftDeleteRecord.objects.using(self.db).filter(
+                    content_type=content_type, **lookup
+            ).values_list('changeset_id', field):
+                changeset_ids.add(cs_id)
+                covered.add(object_id)
+            for cs_id, object_id in ChangeSet.objects.using(self.db).filter(
+                    content_type=content_type, **lookup
+            ).values_list('pk', field):
+                changeset_ids.add(cs_id)
+                covered.add(object_id)
+        changesets = ChangeSet.objects.using(self.db).filter(
+            pk__in=changeset_ids)
+        return changesets, [pk for pk in pks if pk not in covered]
+
+    async def aundelete(self, using='default', *args, **kwargs):
+        '''Async undelete().'''
+        return await sync_to_async(self.undelete)(using, *args, **kwargs)
+
+    # Not proxied onto SoftDeleteManager, like QuerySet.delete().
+    delete.queryset_only = adelete.queryset_only = True
+    undelete.queryset_only = aundelete.queryset_only = True
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    '''
+    Manager of the live objects of a model. The SoftDeleteQuerySet methods
+    are proxied onto it, and every queryset it returns is a
+    SoftDeleteQuerySet from the start, so get(), filter() and the rest
+    chain like on a plain manager.
+    '''
 
-    def get_query_set(self):
-        qs = super(SoftDeleteManager, self).get_query_set().filter(
-            deleted_at__isnull=True)
-        qs.__class__ = SoftDeleteQuerySet
-        return qs
+    def _get_base_queryset(self):
+        '''The queryset of every object, soft deleted ones included.'''
+        return super(SoftDeleteManager, self).get_queryset()
 
     def get_queryset(self):
-        qs = super(SoftDeleteManager, self).get_queryset().filter(
-            deleted_at__isnull=True)
-        qs.__class__ = SoftDeleteQuerySet
+        qs = self._get_base_queryset()
+        # The queryset is brand new: filter in place instead of cloning it.
+        qs.query.add_q(models.Q(deleted_at__isnull=True))
         return qs
 
     def all_with_deleted(self, prt=False):
         if hasattr(self, 'core_filters'):  # it's a RelatedManager
-            qs = self._get_base_queryset().filter(**self.core_filters)
-        else:
-            qs = self._get_base_queryset()
-        qs.__class__ = SoftDeleteQuerySet
-        return qs
+            return self._get_base_queryset().filter(**self.core_filters)
+        return self._get_base_queryset()
 
     def deleted_set(self):
-        qs = self._get_base_queryset().filter(deleted_at__isnull=0)
-        qs.__class__ = SoftDeleteQuerySet
-        return qs
+        return self._get_base_queryset().filter(deleted_at__isnull=0)
 
-    def get(self, *args, **kwargs):
-        return self._get_self_queryset().get(*args, **kwargs)
+    async def aall_with_deleted(self):
+        '''Async all_with_deleted(), evaluated to a list.'''
+        return await sync_to_async(list)(self.all_with_deleted())
 
-    def filter(self, *args, **kwargs):
-        qs = self._get_self_queryset().filter(*args, **kwargs)
-        qs.__class__ = SoftDeleteQuerySet
-        return qs
+    async def adeleted_set(self):
+        '''Async deleted_set(), evaluated to a list.'''
+        return await sync_to_async(list)(self.deleted_set())
 
 
 class SoftDeleteObject(models.Model):
@@ -142,6 +833,21 @@ class SoftDeleteObject(models.Model):
     # softdelete_relation_policy = {'buns': DO_NOTHING}
     softdelete_relation_policy = {}
 
+    # How deleted_at is written when the object is soft deleted or
+    # undeleted: WRITE_SAVE does a full save(), WRITE_UPDATE_FIELDS saves
+    # only deleted_at, and WRITE_UPDATE issues a queryset update() on the
+    # row, without pre_save/post_save and without touching other columns.
+    WRITE_SAVE = 'save'
+    WRITE_UPDATE_FIELDS = 'update_fields'
+    WRITE_UPDATE = 'update'
+
+    softdelete_write_mode = WRITE_SAVE
+
+    # Fields this model is commonly filtered on through the default manager.
+    # The softdelete.W001 system check warns when one of them has no index
+    # over live rows (see softdelete.indexes.LiveIndex).
+    softdelete_lookup_fields = ()
+
     deleted_at = models.DateTimeField(blank=True, null=True, default=None)
     objects = SoftDeleteManager()
 
@@ -169,160 +875,403 @@ class SoftDeleteObject(models.Model):
 
     deleted = property(get_deleted, set_deleted)
 
-    def _do_delete(self, changeset, related, force_policy=None):
-        rel = related.get_accessor_name()
-
-        relation_policy = self.softdelete_relation_policy.get(rel)
-        if force_policy:
-            relation_policy = force_policy
-
-        # if the policy for this relation is set to SOFT_DELETE
-        # we should just end processing of this relation
-        if relation_policy == self.DO_NOTHING:
-            return
-
-        # Sometimes there is nothing to delete
-        if not hasattr(self, rel):
-            return
-
-        delete_kwargs = {
-            'changeset': changeset
-        }
-        if force_policy:
-            delete_kwargs['force_policy'] = force_policy
-
-        if related.one_to_one:
-            obj = getattr(self, rel)
-            if relation_policy == self.SET_NULL:
-                setattr(obj, related.field.name, None)
-                obj.save()
-            else:
-                if isinstance(obj, SoftDeleteObject):
-                    obj.delete(**delete_kwargs)
-                else:
-                    obj.delete()
-        elif related.one_to_many:
-            if relation_policy == self.SET_NULL:
-                getattr(self, rel).all().update(**{related.field.name: None})
-            else:
-                qs = getattr(self, rel).all()
-                if isinstance(qs, SoftDeleteQuerySet):
-                    qs.delete(**delete_kwargs)
-                else:
-                    qs.delete()
+    def _write_deleted_at(self):
+        if self.softdelete_write_mode == self.WRITE_UPDATE:
+            self.__class__._base_manager.using(
+                self._state.db or 'default').filter(pk=self.pk).update(
+                    deleted_at=self.deleted_at)
+        elif self.softdelete_write_mode == self.WRITE_UPDATE_FIELDS:
+            self.save(update_fields=['deleted_at'])
+        else:
+            self.save()
 
     def delete(self, *args, **kwargs):
+        chunked_commit = kwargs.pop('chunked_commit', None)
+        using = self._state.db or 'default'
+        with instrumentation.operation(
+                'hard_delete' if self.deleted_at else 'delete',
+                self.__class__, using), \
+                _operation_atomic(using, chunked_commit):
+            self._delete(*args, **kwargs)
+
+    def _delete(self, *args, **kwargs):
         policy = kwargs.get('force_policy', self.softdelete_policy)
 
         if self.deleted_at:
             logging.debug("HARD DELETEING type %s, %s", type(self), self)
-            try:
-                cs = ChangeSet.objects.get(
-                    content_type=ContentType.objects.get_for_model(self),
-                    object_id=self.pk)
-                cs.delete()
-                super(SoftDeleteObject, self).delete(*args, **kwargs)
-            except:
-                try:
-                    cs = kwargs.get('changeset') or _determine_change_set(self)
-                    rs = SoftDeleteRecord.objects.get(
-                        changeset=cs,
-                        content_type=ContentType.objects.get_for_model(self),
-                        object_id=self.pk)
-                    if rs.changeset.soft_delete_records.count() == 1:
-                        cs.delete()
-                    else:
-                        rs.delete()
-                    super(SoftDeleteObject, self).delete(*args, **kwargs)
-                except:
-                    pass
+            using = (args[0] if args else kwargs.get('using')) or \
+                router.db_for_write(self.__class__, instance=self)
+            keep_parents = (args[1] if len(args) > 1
+                            else kwargs.get('keep_parents', False))
+            instrumentation.count(self.__class__, 1)
+            _hard_delete([self], using, keep_parents)
         elif policy in [self.SOFT_DELETE, self.SOFT_DELETE_CASCADE]:
-            using = kwargs.get('using', settings.DATABASES['default'])
+            cs = self._atomic_soft_delete_root(*args, **kwargs)
+            if cs is None:
+                return
+            if policy == self.SOFT_DELETE_CASCADE:
+                self._cascade_plan(**kwargs).execute(
+                    cs, signal_mode=kwargs.get('signal_mode'),
+                    include_roots=False)
+                logging.debug("FINISHED SOFT DELETING RELATED %s", self)
+
+    def _lock_live_row(self, lock=None):
+        '''
+        Lock the row of this object as ``lock`` says, and tell whether it is
+        still live. It is not when a concurrent deleter soft deleted it
+        first, or, with LOCK_SKIP_LOCKED, holds the lock on it.
+        '''
+        if not (lock or SOFTDELETE_LOCK):
+            return True
+        rows = self.__class__._base_manager.using(
+            self._state.db or 'default').filter(pk=self.pk,
+                                                deleted_at__isnull=True)
+        return bool(list(_locked(rows, lock).values_list('pk', flat=True)))
+
+    def _soft_delete_root(self, *args, **kwargs):
+        using = kwargs.get('using', settings.DATABASES['default'])
+        signal_mode = _resolve_signal_mode(kwargs.get('signal_mode'))
+        per_object = _sends_instance_signals(signal_mode, self.__class__,
+                                             _DELETE_SIGNALS)
+        cs = kwargs.get('changeset') or _determine_change_set(self)
+        if per_object:
             models.signals.pre_delete.send(sender=self.__class__,
                                            instance=self,
                                            using=using)
             pre_soft_delete.send(sender=self.__class__,
                                  instance=self,
                                  using=using)
-            logging.debug('SOFT DELETING type: %s, %s', type(self), self)
-            cs = kwargs.get('changeset') or _determine_change_set(self)
-            SoftDeleteRecord.objects.get_or_create(
-                changeset=cs,
-                content_type=ContentType.objects.get_for_model(self),
-                object_id=self.pk)
-            self.deleted_at = timezone.now()
-            self.save()
-
+        if signal_mode != SIGNALS_PER_OBJECT:
+            pre_bulk_soft_delete.send(sender=self.__class__, pks=[self.pk],
+                                      changeset=cs, using=using)
+        logging.debug('SOFT DELETING type: %s, %s', type(self), self)
+        added = _add_record(cs, self)
+        self.deleted_at = timezone.now()
+        self._write_deleted_at()
+        _count_records(cs, {ContentType.objects.get_for_model(self).pk: added},
+                       cs._state.db or 'default')
+        instrumentation.count(self.__class__, 1, records=added, changeset=cs)
+
+        if per_object:
             models.signals.post_delete.send(sender=self.__class__,
                                             instance=self,
                                             using=using)
             post_soft_delete.send(sender=self.__class__,
                                   instance=self,
                                   using=using)
+        if signal_mode != SIGNALS_PER_OBJECT:
+            post_bulk_soft_delete.send(sender=self.__class__, pks=[self.pk],
+                                       changeset=cs, using=using)
+        return cs
 
-            if policy == self.SOFT_DELETE_CASCADE:
-                all_related = [
-                    f for f in self._meta.get_fields()
-                    if (f.one_to_many or f.one_to_one)
-                    and f.auto_created and not f.concrete
-                ]
-                for x in all_related:
-                    self._do_delete(cs, x)
-                logging.debug("FINISHED SOFT DELETING RELATED %s", self)
-
-    def _do_undelete(self, using='default'):
-        pre_undelete.send(sender=self.__class__,
-                          instance=self,
-                          using=using)
+    def _atomic_soft_delete_root(self, *args, **kwargs):
+        '''
+        Lock the row of this object as ``lock`` says and soft delete it, in
+        one transaction. Returns the ChangeSet, or None when the row was
+        deleted concurrently.
+        '''
+        with transaction.atomic(using=self._state.db or 'default',
+                                savepoint=False):
+            if not self._lock_live_row(kwargs.get('lock')):
+                logging.debug("SKIPPING %s, DELETED CONCURRENTLY", self)
+                return None
+            return self._soft_delete_root(*args, **kwargs)
+
+    def _cascade_plan(self, **kwargs):
+        from softdelete.cascade import cascade_executor
+        return cascade_executor(self.__class__, [self.pk],
+                                force_policy=kwargs.get('force_policy'),
+                                using=self._state.db or 'default',
+                                executor=kwargs.get('cascade_executor'))
+
+    async def adelete(self, *args, **kwargs):
+        '''
+        Async delete(). With chunked commits, the cascade is executed with
+        CascadePlan.aexecute(), which soft deletes independent models
+        concurrently where the database allows it.
+        '''
+        policy = kwargs.get('force_policy', self.softdelete_policy)
+        if (self.deleted_at or policy != self.SOFT_DELETE_CASCADE or
+                not kwargs.pop('chunked_commit', SOFTDELETE_CHUNKED_COMMIT)):
+            return await sync_to_async(self.delete)(*args, **kwargs)
+        cs = await sync_to_async(self._atomic_soft_delete_root)(*args,
+                                                                **kwargs)
+        if cs is None:
+            return
+        plan = await sync_to_async(self._cascade_plan)(**kwargs)
+        await plan.aexecute(cs, signal_mode=kwargs.get('signal_mode'),
+                            include_roots=False)
+        logging.debug("FINISHED SOFT DELETING RELATED %s", self)
+
+    def _do_undelete(self, using='default', changeset=None, signal_mode=None):
+        signal_mode = _resolve_signal_mode(signal_mode)
+        per_object = _sends_instance_signals(signal_mode, self.__class__,
+                                             _UNDELETE_SIGNALS)
+        if per_object:
+            pre_undelete.send(sender=self.__class__,
+                              instance=self,
+                              using=using)
+        if signal_mode != SIGNALS_PER_OBJECT:
+            pre_bulk_undelete.send(sender=self.__class__, pks=[self.pk],
+                                   changeset=changeset, using=using)
         self.deleted_at = None
-        self.save()
-        post_undelete.send(sender=self.__class__,
-                           instance=self,
-                           using=using)
+        self._write_deleted_at()
+        instrumentation.count(self.__class__, 1)
+        if per_object:
+            post_undelete.send(sender=self.__class__,
+                               instance=self,
+                               using=using)
+        if signal_mode != SIGNALS_PER_OBJECT:
+            post_bulk_undelete.send(sender=self.__class__, pks=[self.pk],
+                                    changeset=changeset, using=using)
 
     def undelete(self, using='default', *args, **kwargs):
-        logging.debug('UNDELETING %s' % self)
-        cs = kwargs.get('changeset') or _determine_change_set(self, False)
-        cs.undelete(using)
+        logging.debug('UNDELETING %s', self)
+        cs = kwargs.pop('changeset', None) or _determine_change_set(self, False)
+        cs.undelete(using, **kwargs)
+        self.deleted_at = None
         logging.debug('FINISHED UNDELETING RELATED %s', self)
 
+    async def aundelete(self, using='default', *args, **kwargs):
+        '''Async undelete().'''
+        await sync_to_async(self.undelete)(using, *args, **kwargs)
+
     def save(self, **kwargs):
+        deleting = self.__dirty and self.deleted
+        if deleting:
+            # Stored live, so that delete() takes the soft delete path,
+            # records the changeset and, with a lock, finds the row live
+            # instead of taking it for deleted concurrently.
+            self.deleted_at = None
         super(SoftDeleteObject, self).save(**kwargs)
         if self.__dirty:
             self.__dirty = False
-            if not self.deleted:
-                self.undelete()
-            else:
+            if deleting:
                 self.delete()
+            else:
+                self.undelete()
+
+
+class ContentQuerySet(query.QuerySet):
+    def with_content(self):
+        '''
+        Prefetch the object every row refers to, with one query per content
+        type. Soft deleted objects are included. ``content`` and ``record``
+        then read from the prefetched objects.
+        '''
+        return self.select_related('content_type').prefetch_related('record')
+
+
+class SoftDeleteRecordQuerySet(ContentQuerySet):
+    def with_content(self):
+        return super(SoftDeleteRecordQuerySet, self).with_content(
+            ).select_related('changeset')
+
+
+def _get_content(obj):
+    if obj.__class__.record.is_cached(obj):
+        if obj.record is None:
+            # Prefetching a missing object also clears content_type.
+            raise ObjectDoesNotExist
+        return obj.record
+    model_class = obj.content_type.model_class()
+    if isinstance(model_class.objects, SoftDeleteManager):
+        return model_class.objects.all_with_deleted().get(pk=obj.object_id)
+    return model_class.objects.get(pk=obj.object_id)
 
 
 class ChangeSet(models.Model):
+    # Changesets created by softdelete.jobs carry the operation they were
+    # queued for and its progress; every other changeset is STATUS_DONE.
+    STATUS_DONE = 'done'
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_DONE, 'Done'),
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    OPERATION_DELETE = 'delete'
+    OPERATION_UNDELETE = 'undelete'
+    OPERATION_CHOICES = (
+        (OPERATION_DELETE, 'Delete'),
+        (OPERATION_UNDELETE, 'Undelete'),
+    )
+
     created_date = models.DateTimeField(default=timezone.now)
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.CharField(max_length=100)
+    object_id_int = models.BigIntegerField(null=True, blank=True,
+                                           editable=False)
+    object_id_uuid = models.UUIDField(null=True, blank=True, editable=False)
     record = GenericForeignKey('content_type', 'object_id')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES,
+                              default=STATUS_DONE)
+    operation = models.CharField(max_length=10, choices=OPERATION_CHOICES,
+                                 blank=True, default='')
+    processed = models.PositiveIntegerField(default=0)
+    # Number of SoftDeleteRecord rows in the changeset, in total and by
+    # content type id, kept up to date by the delete, undelete and purge
+    # paths so that sizes can be shown and checked without a COUNT.
+    record_count = models.PositiveIntegerField(default=0, editable=False)
+    record_counts = models.JSONField(default=dict, editable=False)
+
+    objects = ContentQuerySet.as_manager()
 
     class Meta:
         index_together = [
             ("content_type", "object_id"),
         ]
+        indexes = [
+            models.Index(fields=['content_type', 'object_id_int'],
+                         condition=models.Q(object_id_int__isnull=False),
+                         name='sd_changeset_ct_int_idx'),
+            models.Index(fields=['content_type', 'object_id_uuid'],
+                         condition=models.Q(object_id_uuid__isnull=False),
+                         name='sd_changeset_ct_uuid_idx'),
+        ]
 
     def get_content(self):
-        model_class = self.content_type.model_class()
-        if isinstance(model_class.objects, SoftDeleteManager):
-            return model_class.objects.all_with_deleted().get(pk=self.object_id)
-        return model_class.objects.get(pk=self.object_id)
+        return _get_content(self)
 
     def set_content(self, obj):
         self.record = obj
 
-    def undelete(self, using='default'):
-        logging.debug("CHANGESET UNDELETE: %s" % self)
-        self.content._do_undelete(using)
-        for related in self.soft_delete_records.all():
-            related.undelete(using)
+    def get_record_counts(self):
+        '''The number of records in the changeset, by model class.'''
+        return dict(
+            (ContentType.objects.get_for_id(int(ct_id)).model_class(), count)
+            for ct_id, count in self.record_counts.items())
+
+    def undelete(self, using='default', bulk=False, chunk_size=None,
+                 signal_mode=None, chunked_commit=None):
+        db = self._state.db or 'default'
+        with instrumentation.operation('undelete', None, db, self), \
+                _operation_atomic(db, chunked_commit):
+            if bulk:
+                return self._bulk_undelete(using, chunk_size, signal_mode)
+            logging.debug("CHANGESET UNDELETE: %s", self)
+            try:
+                root = self.content
+            except ObjectDoesNotExist:
+                # The root was purged; its records of other objects were
+                # kept so that those can still be undeleted.
+                logging.debug("ROOT OF %s IS GONE", self)
+            else:
+                root._do_undelete(using, self, signal_mode)
+            self._stream_undelete(db, chunk_size, signal_mode)
+            _forget_change_set(self)
+            self.delete()
+            logging.debug("FINISHED CHANGESET UNDELETE: %s", self)
+
+    async def aundelete(self, using='default', *args, **kwargs):
+        '''Async undelete().'''
+        return await sync_to_async(self.undelete)(using, *args, **kwargs)
+
+    def _stream_undelete(self, using, chunk_size, signal_mode):
+        '''
+        Restore the objects recorded in the changeset, other than its root,
+        streaming the records ``chunk_size`` at a time. Objects are only
+        loaded when something needs the instances: per-instance signal
+        receivers, or a save() that _saves_instances() says cannot be
+        skipped. Every other chunk is restored with a single UPDATE.
+        '''
+        chunk_size = chunk_size or SOFTDELETE_BULK_CHUNK_SIZE
+        signal_mode = _resolve_signal_mode(signal_mode)
+        records = self.soft_delete_records.using(using).exclude(
+            content_type=self.content_type_id, object_id=self.object_id
+        ).order_by('pk').values_list('content_type_id', 'object_id')
+        for chunk in _chunked(records.iterator(chunk_size=chunk_size),
+                              chunk_size):
+            by_type = OrderedDict()
+            for ct_id, object_id in chunk:
+                by_type.setdefault(ct_id, []).append(object_id)
+            for ct_id, object_ids in by_type.items():
+                model = ContentType.objects.get_for_id(ct_id).model_class()
+                if model is None or not issubclass(model, SoftDeleteObject):
+                    continue
+                self._undelete_chunk(model, object_ids, using, chunk_size,
+                                     signal_mode)
+            instrumentation.count(records=len(chunk))
+
+    def _undelete_chunk(self, model, object_ids, using, chunk_size,
+                        signal_mode):
+        if _saves_instances(model):
+            to_python = model._meta.pk.to_python
+            for obj in model._base_manager.using(using).filter(
+                    pk__in=[to_python(pk) for pk in object_ids]):
+                obj._do_undelete(using, self, signal_mode)
+        elif (signal_mode == SIGNALS_PER_OBJECT
+              and not _sends_instance_signals(SIGNALS_AUTO, model,
+                                              _UNDELETE_SIGNALS)):
+            # Per-instance signals nobody receives: no need for instances.
+            to_python = model._meta.pk.to_python
+            model._base_manager.using(using).filter(
+                pk__in=[to_python(pk) for pk in object_ids]
+            ).update(deleted_at=None)
+            instrumentation.count(model, len(object_ids))
+        else:
+            _bulk_undelete(model, object_ids, changeset=self, using=using,
+                           chunk_size=chunk_size, signal_mode=signal_mode)
+
+    def _bulk_undelete(self, using, chunk_size, signal_mode, on_chunk=None):
+        '''
+        Restore the objects of the changeset a chunk of records at a time:
+        one UPDATE per content type in the chunk, then the chunk's records
+        are deleted, in one transaction, and ``on_chunk(model, pks)`` is
+        called per content type. An interrupted undelete can therefore be
+        resumed by calling it again. The changeset is dropped at the end.
+        '''
+        db = self._state.db or 'default'
+        chunk_size = chunk_size or SOFTDELETE_BULK_CHUNK_SIZE
+        records = SoftDeleteRecord.objects.using(db).filter(
+            changeset=self).order_by('pk')
+        root = (self.content_type_id, self.object_id)
+        restored = 0
+        while True:
+            chunk = list(records.values_list(
+                'pk', 'content_type_id', 'object_id')[:chunk_size])
+            if not chunk:
+                break
+            by_type = OrderedDict()
+            for record_pk, ct_id, object_id in chunk:
+                by_type.setdefault(ct_id, []).append(object_id)
+            with transaction.atomic(using=db):
+                for ct_id, object_ids in by_type.items():
+                    # The root is restored last, once, recorded or not.
+                    object_ids = [object_id for object_id in object_ids
+                                  if (ct_id, object_id) != root]
+                    if object_ids:
+                        self._undelete_objects(ct_id, object_ids, db,
+                                               chunk_size, signal_mode,
+                                               on_chunk)
+                SoftDeleteRecord.objects.using(db).filter(
+                    pk__in=[x[0] for x in chunk]).delete()
+                _count_records(self, dict(
+                    (ct_id, -len(object_ids))
+                    for ct_id, object_ids in by_type.items()), db)
+                instrumentation.count(records=len(chunk))
+            restored += len(chunk)
+        self._undelete_objects(self.content_type_id, [self.object_id], db,
+                               chunk_size, signal_mode, on_chunk)
+        _forget_change_set(self)
         self.delete()
-        logging.debug("FINISHED CHANGESET UNDELETE: %s", self)
+        logging.debug("FINISHED BULK CHANGESET UNDELETE: %s objects",
+                      restored)
+
+    def _undelete_objects(self, ct_id, object_ids, using, chunk_size,
+                          signal_mode, on_chunk=None):
+        model_class = ContentType.objects.get_for_id(ct_id).model_class()
+        if model_class is None or not issubclass(model_class,
+                                                 SoftDeleteObject):
+            return
+        _bulk_undelete(model_class, object_ids, changeset=self, using=using,
+                       chunk_size=chunk_size, signal_mode=signal_mode)
+        if on_chunk is not None:
+            on_chunk(model_class, object_ids)
 
     def __str__(self):
         return 'Changeset: %s, %s' % (self.created_date, self.record)
@@ -335,25 +1284,35 @@ class SoftDeleteRecord(models.Model):
     created_date = models.DateTimeField(default=timezone.now)
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.CharField(max_length=100)
+    object_id_int = models.BigIntegerField(null=True, blank=True,
+                                           editable=False)
+    object_id_uuid = models.UUIDField(null=True, blank=True, editable=False)
     record = GenericForeignKey('content_type', 'object_id')
 
+    objects = SoftDeleteRecordQuerySet.as_manager()
+
     class Meta:
         unique_together = (('changeset', 'content_type', 'object_id'),)
         index_together = [
             ("content_type", "object_id"),
         ]
+        indexes = [
+            models.Index(fields=['content_type', 'object_id_int'],
+                         condition=models.Q(object_id_int__isnull=False),
+                         name='sd_record_ct_int_idx'),
+            models.Index(fields=['content_type', 'object_id_uuid'],
+                         condition=models.Q(object_id_uuid__isnull=False),
+                         name='sd_record_ct_uuid_idx'),
+        ]
 
     def get_content(self):
-        model_class = self.content_type.model_class()
-        if isinstance(model_class.objects, SoftDeleteManager):
-            return model_class.objects.all_with_deleted().get(pk=self.object_id)
-        return model_class.objects.get(pk=self.object_id)
+        return _get_content(self)
 
     def set_content(self, obj):
         self.record = obj
 
-    def undelete(self, using='default'):
-        self.content._do_undelete(using)
+    def undelete(self, using='default', signal_mode=None):
+        self.content._do_undelete(using, self.changeset, signal_mode)
 
     def __str__(self):
         return u'SoftDeleteRecord: (%s), (%s/%s), %s' % (
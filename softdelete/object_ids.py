@@ -0,0 +1,57 @@
+from __future__ import unicode_literals
+
+import logging
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+
+from softdelete.models import (ChangeSet, SoftDeleteRecord,
+                               SOFTDELETE_BULK_CHUNK_SIZE, _object_id_column)
+
+
+def backfill_object_ids(model, chunk_size=None, using='default',
+                        progress=None):
+    '''
+    Copy object_id into the typed column fitting the primary key of
+    ``model``, object_id_int or object_id_uuid, on every SoftDeleteRecord
+    and ChangeSet of its objects that does not have it yet.
+
+    Rows are updated ``chunk_size`` at a time, walking the table in primary
+    key order, and ``progress(model, filled)`` is called after every chunk.
+    Rows whose object_id is not a valid primary key are left alone. Returns
+    the number of rows filled in; 0 when the primary key of ``model`` has
+    no typed column.
+    '''
+    field = _object_id_column(model)
+    if field is None:
+        return 0
+    chunk_size = chunk_size or SOFTDELETE_BULK_CHUNK_SIZE
+    content_type = ContentType.objects.db_manager(using).get_for_model(model)
+    to_python = model._meta.pk.to_python
+    filled = 0
+    for row_model in (SoftDeleteRecord, ChangeSet):
+        rows = row_model.objects.using(using).filter(
+            content_type=content_type, **{'%s__isnull' % field: True}
+        ).order_by('pk')
+        last_pk = None
+        while True:
+            chunk = rows if last_pk is None else rows.filter(pk__gt=last_pk)
+            chunk = list(chunk.values_list('pk', 'object_id')[:chunk_size])
+            if not chunk:
+                break
+            last_pk = chunk[-1][0]
+            objs = []
+            for pk, object_id in chunk:
+                try:
+                    value = to_python(object_id)
+                except ValidationError:
+                    logging.debug("SKIPPING %s %s: invalid object id %r",
+                                  row_model.__name__, pk, object_id)
+                    continue
+                objs.append(row_model(pk=pk, **{field: value}))
+            row_model.objects.using(using).bulk_update(objs, [field])
+            filled += len(objs)
+            logging.debug("BACKFILLED %s object ids of type %s", filled, model)
+            if progress is not None:
+                progress(model, filled)
+    return filled
@@ -0,0 +1,62 @@
+from __future__ import unicode_literals
+
+import datetime
+import logging
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from softdelete import instrumentation
+from softdelete.models import SOFTDELETE_BULK_CHUNK_SIZE, _hard_delete
+
+
+def purge_deleted(model, older_than, chunk_size=None, sleep=0, dry_run=False,
+                  using='default', progress=None):
+    '''
+    Hard delete the objects of ``model`` that were soft deleted before
+    ``older_than``, a datetime or a timedelta back from now.
+
+    Objects are purged oldest first, ``chunk_size`` at a time, each chunk in
+    its own transaction together with the cleanup of the SoftDeleteRecord
+    rows of its objects and of the objects on_delete cascades remove with
+    them, and of the ChangeSets it empties. ``sleep`` seconds are waited
+    between chunks to throttle the load on the database, and
+    ``progress(model, purged)`` is called after every chunk. With
+    ``dry_run`` nothing is deleted. Returns the number of objects purged,
+    or that would be purged.
+    '''
+    if isinstance(older_than, datetime.timedelta):
+        older_than = timezone.now() - older_than
+    chunk_size = chunk_size or SOFTDELETE_BULK_CHUNK_SIZE
+    manager = model._base_manager.using(using)
+    expired = manager.filter(deleted_at__isnull=False,
+                             deleted_at__lt=older_than)
+    if dry_run:
+        return expired.count()
+
+    with instrumentation.operation('purge', model, using):
+        return _purge_chunks(model, expired, chunk_size, sleep, using,
+                             progress)
+
+
+def _purge_chunks(model, expired, chunk_size, sleep, using, progress):
+    manager = model._base_manager.using(using)
+    purged = 0
+    while True:
+        with transaction.atomic(using=using):
+            pks = list(expired.order_by('deleted_at', 'pk')
+                       .values_list('pk', flat=True)[:chunk_size])
+            if not pks:
+                break
+            _hard_delete(manager.filter(pk__in=pks), using)
+        instrumentation.count(model, len(pks))
+        purged += len(pks)
+        logging.debug("PURGED %s objects of type %s", purged, model)
+        if progress is not None:
+            progress(model, purged)
+        if len(pks) < chunk_size:
+            break
+        if sleep:
+            time.sleep(sleep)
+    return purged
@@ -4,3 +4,17 @@ pre_soft_delete = Signal(providing_args=['instance'])
 post_soft_delete = Signal(providing_args=['instance'])
 pre_undelete = Signal(providing_args=['instance'])
 post_undelete = Signal(providing_args=['instance'])
+
+# Sent with the model as sender and the primary keys of a chunk of objects,
+# once per chunk of a cascade or bulk delete, when the signal dispatch mode
+# is SIGNALS_PER_BATCH or SIGNALS_AUTO (see softdelete.models).
+pre_bulk_soft_delete = Signal(providing_args=['pks', 'changeset'])
+post_bulk_soft_delete = Signal(providing_args=['pks', 'changeset'])
+
+# Sent likewise once per chunk of undeleted objects.
+pre_bulk_undelete = Signal(providing_args=['pks', 'changeset'])
+post_bulk_undelete = Signal(providing_args=['pks', 'changeset'])
+
+# Sent once at the end of every instrumented delete, undelete and purge,
+# with an aggregated softdelete.instrumentation.OperationStats summary.
+post_operation = Signal(providing_args=['stats'])
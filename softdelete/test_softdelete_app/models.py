@@ -1,14 +1,21 @@
+import uuid
+
 from django.db import models
 from django.contrib import admin
 from softdelete.models import *
 from softdelete.admin import *
+from softdelete.indexes import LiveIndex
 
 class TestModelOne(SoftDeleteObject):
     extra_bool = models.BooleanField(default=False)
     
 class TestModelTwo(SoftDeleteObject):
+    softdelete_lookup_fields = ('tmo',)
     extra_int = models.IntegerField()
     tmo = models.ForeignKey(TestModelOne,related_name='tmts', on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [LiveIndex(fields=['tmo'])]
     
 class TestModelThree(SoftDeleteObject):
     tmos = models.ManyToManyField(TestModelOne, through='TestModelThrough')
@@ -65,6 +72,15 @@ class TestModelOneToOneRelationWithNonSoftDeleteObject(models.Model):
 class TestModelDefault(SoftDeleteObject):
     parent = models.ForeignKey(TestModelSoftDelete, related_name='y', on_delete=models.CASCADE)
 
+class TestModelUUID(SoftDeleteObject):
+    softdelete_typed_object_ids = True
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+
+class TestModelUUIDChild(SoftDeleteObject):
+    softdelete_typed_object_ids = True
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    parent = models.ForeignKey(TestModelUUID, related_name='children', on_delete=models.CASCADE)
+
 
 admin.site.register(TestModelOne, SoftDeleteObjectAdmin)
 admin.site.register(TestModelTwo, SoftDeleteObjectAdmin)
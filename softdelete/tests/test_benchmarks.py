@@ -0,0 +1,37 @@
+from django.test import TestCase
+
+from softdelete.benchmarks import compare
+from softdelete.benchmarks.managers import OPERATIONS, measure_managers
+from softdelete.benchmarks.scenarios import SCENARIOS, run_benchmarks
+from softdelete.models import ChangeSet
+from softdelete.test_softdelete_app.models import TestModelOne
+
+
+class BenchmarkTest(TestCase):
+    def test_scenarios(self):
+        results = run_benchmarks([10, 20], memory=False)
+        self.assertEquals(2 * len(SCENARIOS), len(results))
+        for result in results:
+            self.assertTrue(result['queries'] > 0, result['scenario'])
+            self.assertEquals(None, result['peak_memory'])
+        self.assertEquals(0, ChangeSet.objects.count())
+
+    def test_peak_memory(self):
+        result, = run_benchmarks([10], ['cascade_delete'])
+        self.assertTrue(result['peak_memory'] > 0)
+
+    def test_compare(self):
+        baseline = [{'scenario': 'cascade_delete', 'size': 10,
+                     'backend': 'sqlite', 'seconds': 1.0, 'queries': 20,
+                     'peak_memory': None}]
+        same = [dict(baseline[0], seconds=1.2)]
+        self.assertEquals([], compare(same, baseline))
+        slower = [dict(baseline[0], seconds=2.0, queries=21)]
+        self.assertEquals(2, len(compare(slower, baseline)))
+
+    def test_managers(self):
+        results = measure_managers(number=2, repeat=1)
+        self.assertEquals(2 * len(OPERATIONS), len(results))
+        self.assertEquals(['plain', 'softdelete'] * len(OPERATIONS),
+                          [result['manager'] for result in results])
+        self.assertEquals(0, TestModelOne._base_manager.count())
@@ -0,0 +1,107 @@
+from django.test import override_settings
+from softdelete.test_softdelete_app.models import (
+    TestModelOne,
+    TestModelTwo,
+    TestModelThrough,
+)
+from softdelete.models import *
+from softdelete.jobs import (enqueue_delete, enqueue_undelete, get_backend,
+                             resume_jobs, run_job)
+from softdelete.tests.test_sd import BaseTest
+
+
+@override_settings(SOFTDELETE_JOB_BACKEND='softdelete.jobs.LocalBackend')
+class JobTest(BaseTest):
+    def setUp(self):
+        super(JobTest, self).setUp()
+        self.backend = get_backend()
+        self.backend.queue = []
+
+    def test_delete_and_undelete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            cs = enqueue_delete(self.tmo1)
+        self.assertEquals(ChangeSet.STATUS_PENDING, cs.status)
+        self.assertEquals(1, len(self.backend.queue))
+        self.assertEquals(2, TestModelOne.objects.count())
+
+        self.backend.run_pending()
+        cs.refresh_from_db()
+        self.assertEquals(ChangeSet.STATUS_DONE, cs.status)
+        self.assertEquals(56, cs.processed)
+        self.assertEquals(56, cs.soft_delete_records.count())
+        self.assertEquals(1, TestModelOne.objects.count())
+        self.assertEquals(5, TestModelTwo.objects.count())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue_undelete(cs)
+        cs.refresh_from_db()
+        self.assertEquals(ChangeSet.STATUS_PENDING, cs.status)
+        self.backend.run_pending()
+        self.assertFalse(ChangeSet.objects.filter(pk=cs.pk).exists())
+        self.assertEquals(2, TestModelOne.objects.count())
+        self.assertEquals(10, TestModelTwo.objects.count())
+        self.assertEquals(100, TestModelThrough.objects.count())
+
+    def test_resume_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            cs = enqueue_delete(self.tmo1)
+        # Simulate a worker that died after the first levels of the
+        # cascade: the root and its TestModelTwo children are deleted, the
+        # job is still marked running and nothing is queued any more.
+        self.backend.queue = []
+        SoftDeleteRecord.objects.create(
+            changeset=cs, content_type=cs.content_type, object_id=cs.object_id)
+        for tmt in self.tmo1.tmts.all():
+            SoftDeleteRecord.objects.create(
+                changeset=cs,
+                content_type=ContentType.objects.get_for_model(tmt),
+                object_id=str(tmt.pk))
+        TestModelOne.objects.filter(pk=self.tmo1.pk).update(
+            deleted_at=timezone.now())
+        self.tmo1.tmts.all().update(deleted_at=timezone.now())
+        ChangeSet.objects.filter(pk=cs.pk).update(
+            status=ChangeSet.STATUS_RUNNING)
+        self.assertEquals(50, self.tmo1.left_side.count())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEquals([cs], resume_jobs())
+        self.backend.run_pending()
+        cs.refresh_from_db()
+        self.assertEquals(ChangeSet.STATUS_DONE, cs.status)
+        self.assertEquals(56, cs.soft_delete_records.count())
+        self.assertEquals(50, TestModelThrough.objects.count())
+
+    def test_resume_undelete(self):
+        self.tmo1.delete()
+        cs = ChangeSet.objects.get()
+        cs._bulk_undelete('default', 10, None)
+        self.assertEquals(0, ChangeSet.objects.count())
+
+        self.tmo1 = TestModelOne.objects.get(pk=self.tmo1.pk)
+        self.tmo1.delete()
+        cs = ChangeSet.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue_undelete(cs)
+        self.backend.queue = []
+        # Restore part of the changeset by hand, as a crashed job would.
+        first = list(cs.soft_delete_records.order_by('pk')[:20])
+        for record in first:
+            record.undelete()
+        SoftDeleteRecord.objects.filter(pk__in=[r.pk for r in first]).delete()
+        run_job(cs.pk)
+        self.assertEquals(0, ChangeSet.objects.count())
+        self.assertEquals(0, SoftDeleteRecord.objects.count())
+        self.assertEquals(2, TestModelOne.objects.count())
+        self.assertEquals(100, TestModelThrough.objects.count())
+
+    def test_failed_job(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            cs = enqueue_delete(self.tmo1)
+        self.backend.queue = []
+        ChangeSet.objects.filter(pk=cs.pk).update(object_id='not-a-pk')
+        self.assertRaises(Exception, run_job, cs.pk)
+        cs.refresh_from_db()
+        self.assertEquals(ChangeSet.STATUS_FAILED, cs.status)
+        self.assertEquals([], resume_jobs())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEquals([cs], resume_jobs(include_failed=True))
@@ -1,8 +1,18 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+
 from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
 from django.core.exceptions import ObjectDoesNotExist
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import connection, models
+from django.test.utils import CaptureQueriesContext, isolate_apps
 from softdelete.test_softdelete_app.models import (
     TestModelOne,
     TestModelTwo,
@@ -15,9 +25,17 @@ from softdelete.test_softdelete_app.models import (
     TestModelSoftDeleteOnRelationLevelChild,
     TestModelSoftDeleteOnRelationLevelSecondChild,
     TestModelSoftDeleteOnRelationLevelChildSetNull,
-    TestModelOneToOneRelationWithNonSoftDeleteObject
+    TestModelOneToOneRelationWithNonSoftDeleteObject,
+    TestModelUUID,
+    TestModelUUIDChild,
 )
 from softdelete.models import *
+from softdelete.admin import SoftDeleteObjectAdmin
+from softdelete.models import (_changeset_scope, _determine_change_set,
+                               _recorded_pks, _sends_instance_signals,
+                               _DELETE_SIGNALS)
+from softdelete import instrumentation
+from softdelete.cascade import CASCADE_SUBQUERY
 from softdelete.signals import *
 import logging
 try:
@@ -199,6 +217,963 @@ class DeleteTest(BaseTest):
         self.assertEquals(self.rs_count+56, SoftDeleteRecord.objects.count())
         self._posttest()
 
+    def test_bulk_filter_delete(self):
+        self._pretest()
+        TestModelOne.objects.filter(pk=self.tmo1.pk).delete(bulk=True,
+                                                            chunk_size=2)
+        self.assertEquals(self.cs_count+1, ChangeSet.objects.count())
+        self.assertEquals(self.rs_count+56, SoftDeleteRecord.objects.count())
+        self._posttest()
+
+    def test_bulk_delete_single_changeset(self):
+        cs_count = ChangeSet.objects.count()
+        TestModelTwo.objects.filter(tmo=self.tmo1).delete(bulk=True,
+                                                          chunk_size=2)
+        self.assertEquals(cs_count+1, ChangeSet.objects.count())
+        self.assertEquals(0, self.tmo1.tmts.count())
+        self.assertEquals(5, TestModelTwo.objects.count())
+        TestModelTwo.objects.deleted_set().undelete()
+        self.assertEquals(10, TestModelTwo.objects.count())
+        self.assertEquals(cs_count, ChangeSet.objects.count())
+
+    def test_delete_in_windows(self):
+        with CaptureQueriesContext(connection) as queries:
+            TestModelThrough.objects.all().delete(chunk_size=30)
+        self.assertEquals(0, TestModelThrough.objects.count())
+        self.assertEquals(100, TestModelThrough.objects.deleted_set().count())
+        windows = [q['sql'] for q in queries.captured_queries
+                   if q['sql'].startswith('SELECT') and 'LIMIT 30' in q['sql']]
+        self.assertEquals(4, len(windows))
+        self.assertNotIn('OFFSET', ' '.join(windows))
+
+    def test_delete_sliced(self):
+        TestModelOne.objects.order_by('-pk')[:1].delete()
+        self.assertEquals([self.tmo1.pk],
+                          [x.pk for x in TestModelOne.objects.all()])
+
+    def test_bulk_delete_batch_signals(self):
+        batches = []
+
+        def pre_bulk(sender, pks, **kwargs):
+            batches.append(list(pks))
+        pre_bulk_soft_delete.connect(pre_bulk, sender=TestModelTwo)
+        self.pre_soft_delete_called = False
+        pre_soft_delete.connect(self.pre_soft_delete, sender=TestModelTwo)
+        try:
+            TestModelTwo.objects.filter(tmo=self.tmo1).delete(
+                bulk=True, chunk_size=2, signal_mode=SIGNALS_PER_BATCH)
+        finally:
+            pre_bulk_soft_delete.disconnect(pre_bulk, sender=TestModelTwo)
+            pre_soft_delete.disconnect(self.pre_soft_delete,
+                                       sender=TestModelTwo)
+        self.assertEquals([2, 2, 1], [len(x) for x in batches])
+        self.assertFalse(self.pre_soft_delete_called)
+
+    def test_signal_dispatch_context(self):
+        batches = []
+        instances = []
+
+        def post_bulk(sender, pks, changeset, **kwargs):
+            batches.append((sender, len(pks), changeset))
+
+        def post_instance(sender, instance, **kwargs):
+            instances.append(instance)
+        post_bulk_soft_delete.connect(post_bulk)
+        post_soft_delete.connect(post_instance)
+        try:
+            with signal_dispatch(SIGNALS_PER_BATCH):
+                self.tmo1.delete()
+        finally:
+            post_bulk_soft_delete.disconnect(post_bulk)
+            post_soft_delete.disconnect(post_instance)
+        cs = ChangeSet.objects.get()
+        self.assertEquals([], instances)
+        self.assertEquals(set([(TestModelOne, 1, cs), (TestModelTwo, 5, cs),
+                               (TestModelThrough, 50, cs)]), set(batches))
+
+    def test_signal_dispatch_auto(self):
+        instances = []
+        batches = []
+
+        def pre_instance(sender, instance, **kwargs):
+            instances.append(sender)
+
+        def pre_bulk(sender, pks, **kwargs):
+            batches.append(sender)
+        pre_soft_delete.connect(pre_instance, sender=TestModelTwo)
+        pre_bulk_soft_delete.connect(pre_bulk)
+        try:
+            self.assertTrue(_sends_instance_signals(
+                SIGNALS_AUTO, TestModelTwo, _DELETE_SIGNALS))
+            self.assertFalse(_sends_instance_signals(
+                SIGNALS_AUTO, TestModelThrough, _DELETE_SIGNALS))
+            self.tmo1.delete(signal_mode=SIGNALS_AUTO)
+        finally:
+            pre_soft_delete.disconnect(pre_instance, sender=TestModelTwo)
+            pre_bulk_soft_delete.disconnect(pre_bulk)
+        self.assertEquals([TestModelTwo] * 5, instances)
+        self.assertEquals(set([TestModelOne, TestModelTwo, TestModelThrough]),
+                          set(batches))
+
+    def test_cascade_query_count(self):
+        with CaptureQueriesContext(connection) as small:
+            self.tmo2.delete()
+        for x in range(50):
+            TestModelTwo.objects.create(extra_int=x, tmo=self.tmo1)
+            t3 = TestModelThree.objects.create()
+            TestModelThrough.objects.create(tmo1=self.tmo1, tmo3=t3)
+        with CaptureQueriesContext(connection) as large:
+            self.tmo1.delete()
+        self.assertEquals(len(small), len(large))
+        self.assertEquals(0, TestModelTwo.objects.count())
+        self.assertEquals(0, TestModelThrough.objects.count())
+
+    def test_cascade_plan_levels(self):
+        from softdelete.cascade import CascadePlan
+        plan = CascadePlan(TestModelSafeDeleteCascade,
+                           [self.tmo_soft_delete_cascade.pk])
+        self.assertEquals(2, len(plan.levels))
+        self.assertEquals([self.tmo_soft_delete.pk],
+                          plan.levels[1][TestModelSoftDelete])
+        plan = CascadePlan(TestModelSoftDeleteOnRelationLevelParent,
+                           [self.tmo_soft_delete_relation_parent.pk])
+        self.assertEquals([self.tmo_soft_delete_relation_second_child.pk],
+                          plan.levels[1][TestModelSoftDeleteOnRelationLevelSecondChild])
+        self.assertNotIn(TestModelSoftDeleteOnRelationLevelChild, plan.levels[1])
+        self.assertEquals(1, len(plan.set_null))
+        self.assertEquals(1, len(plan.hard_delete))
+
+    def test_bulk_delete_force_soft_delete(self):
+        TestModelOne.objects.filter(pk=self.tmo1.pk).delete(
+            bulk=True, force_policy=SoftDeleteObject.SOFT_DELETE)
+        self.assertEquals(1, TestModelOne.objects.count())
+        self.assertEquals(10, TestModelTwo.objects.count())
+        self.assertEquals(1, SoftDeleteRecord.objects.count())
+
+    def test_cascade_respects_related_model_policy(self):
+        with mock.patch.object(TestModelTwo, 'softdelete_policy',
+                               SoftDeleteObject.DO_NOTHING):
+            self.tmo1.delete()
+            TestModelOne.objects.filter(pk=self.tmo2.pk).delete(bulk=True)
+            TestModelTwo.objects.filter(tmo=self.tmo2).delete(bulk=True)
+        self.assertEquals(0, TestModelOne.objects.count())
+        self.assertEquals(10, TestModelTwo.objects.count())
+        self.assertEquals(0, TestModelThrough.objects.count())
+
+    def _fail_on_through(self, sender, **kwargs):
+        raise RuntimeError('cascade failed')
+
+    def test_failed_cascade_rolls_back(self):
+        pre_soft_delete.connect(self._fail_on_through, sender=TestModelThrough)
+        try:
+            self.assertRaises(RuntimeError, self.tmo1.delete)
+        finally:
+            pre_soft_delete.disconnect(self._fail_on_through,
+                                       sender=TestModelThrough)
+        self.assertEquals(2, TestModelOne.objects.count())
+        self.assertEquals(10, TestModelTwo.objects.count())
+        self.assertEquals(100, TestModelThrough.objects.count())
+        self.assertEquals(0, ChangeSet.objects.count())
+        self.assertEquals(0, SoftDeleteRecord.objects.count())
+
+    def test_failed_cascade_chunked_commit(self):
+        pre_soft_delete.connect(self._fail_on_through, sender=TestModelThrough)
+        try:
+            self.assertRaises(RuntimeError, self.tmo1.delete,
+                              chunked_commit=True)
+        finally:
+            pre_soft_delete.disconnect(self._fail_on_through,
+                                       sender=TestModelThrough)
+        # The root was committed, the failed chunk was rolled back, and the
+        # records match the rows that are soft deleted.
+        self.assertEquals(1, TestModelOne.objects.count())
+        self.assertEquals(100, TestModelThrough.objects.count())
+        self.assertEquals(1, ChangeSet.objects.count())
+        self.assertEquals(
+            1 + TestModelTwo.objects.deleted_set().count(),
+            SoftDeleteRecord.objects.count())
+        from softdelete.cascade import CascadePlan
+        cs = ChangeSet.objects.get()
+        CascadePlan(TestModelOne, [self.tmo1.pk], changeset=cs).execute(cs)
+        self.assertEquals(5, TestModelTwo.objects.count())
+        self.assertEquals(50, TestModelThrough.objects.count())
+        self.assertEquals(56, SoftDeleteRecord.objects.count())
+
+    def test_lock_skips_concurrently_deleted_root(self):
+        stale = TestModelOne.objects.get(pk=self.tmo1.pk)
+        self.tmo1.delete()
+        deleted = []
+
+        def collect(sender, instance, **kwargs):
+            deleted.append(instance)
+        pre_soft_delete.connect(collect)
+        try:
+            stale.delete(lock=LOCK_WAIT)
+        finally:
+            pre_soft_delete.disconnect(collect)
+        self.assertEquals([], deleted)
+        self.assertEquals(1, ChangeSet.objects.count())
+        self.assertEquals(56, SoftDeleteRecord.objects.count())
+        self.assertTrue(TestModelOne.objects.all_with_deleted().get(
+            pk=self.tmo1.pk).deleted)
+
+    def test_child_deleted_after_planning(self):
+        from softdelete.cascade import CascadePlan
+        plan = CascadePlan(TestModelOne, [self.tmo1.pk])
+        child = self.tmo1.tmts.all()[0]
+        child.delete()
+        cs = ChangeSet.objects.create(
+            content_type=ContentType.objects.get_for_model(self.tmo1),
+            object_id=str(self.tmo1.pk))
+        plan.execute(cs)
+        # The child is left to the changeset of the delete that got it first.
+        self.assertEquals(55, cs.soft_delete_records.count())
+        self.assertEquals(55, ChangeSet.objects.get(pk=cs.pk).record_count)
+        self.assertFalse(cs.soft_delete_records.filter(
+            object_id=str(child.pk),
+            content_type=ContentType.objects.get_for_model(child)).exists())
+
+    def test_lock_save_deleted(self):
+        with mock.patch('softdelete.models.SOFTDELETE_LOCK', LOCK_WAIT):
+            self.tmo1.deleted = True
+            self.tmo1.save()
+        self.assertEquals(1, ChangeSet.objects.count())
+        self.assertEquals(56, SoftDeleteRecord.objects.count())
+        self.assertEquals(5, TestModelTwo.objects.count())
+
+    def test_lock_options(self):
+        self.tmo1.delete(lock=LOCK_NOWAIT)
+        TestModelOne.objects.filter(pk=self.tmo2.pk).delete(
+            bulk=True, lock=LOCK_SKIP_LOCKED)
+        self.assertEquals(0, TestModelOne.objects.count())
+        self.assertEquals(0, TestModelTwo.objects.count())
+
+    def test_existing_record_does_not_conflict(self):
+        cs = ChangeSet.objects.create(
+            content_type=ContentType.objects.get_for_model(self.tmo1),
+            object_id=str(self.tmo1.pk))
+        SoftDeleteRecord.objects.create(
+            changeset=cs,
+            content_type=ContentType.objects.get_for_model(self.tmo1),
+            object_id=str(self.tmo1.pk))
+        self.tmo1.delete(changeset=cs)
+        self.assertEquals(56, cs.soft_delete_records.count())
+
+class CascadeRelationsTest(BaseTest):
+    def test_relations_built_when_ready(self):
+        from softdelete.cascade import cascade_relations
+        relations = dict((r.accessor_name, r) for r in
+                         cascade_relations[TestModelSoftDeleteOnRelationLevelParent])
+        self.assertEquals(SoftDeleteObject.DO_NOTHING, relations['x'].policy)
+        self.assertEquals(SoftDeleteObject.SOFT_DELETE_CASCADE,
+                          relations['y'].policy)
+        self.assertEquals(SoftDeleteObject.SET_NULL, relations['z'].policy)
+        self.assertTrue(relations['y'].is_softdelete)
+        self.assertFalse(relations['xyz'].is_softdelete)
+        self.assertTrue(relations['xyz'].one_to_one)
+        with self.assertRaises(TypeError):
+            cascade_relations[TestModelOne] = ()
+
+    def test_dump(self):
+        from softdelete.cascade import dump_cascade_relations
+        dump = dump_cascade_relations()
+        relations = dump['test_softdelete_app.TestModelOne']
+        self.assertIn({'accessor_name': 'tmts',
+                       'field_name': 'tmo',
+                       'related_model': 'test_softdelete_app.TestModelTwo',
+                       'one_to_one': False,
+                       'policy': 'SOFT_DELETE_CASCADE',
+                       'is_softdelete': True}, relations)
+
+class ChangeSetContextTest(BaseTest):
+    def test_explicit_changeset(self):
+        cs = ChangeSet.objects.create(
+            content_type=ContentType.objects.get_for_model(self.tmo1),
+            object_id=str(self.tmo1.pk))
+        with changeset_context(changeset=cs):
+            self.tmo1.delete()
+            self.tmo_soft_delete_cascade.delete()
+            TestModelTwo.objects.filter(tmo=self.tmo2).delete(bulk=True)
+        self.assertEquals(1, ChangeSet.objects.count())
+        self.assertEquals(56 + 2 + 5, cs.soft_delete_records.count())
+        cs.undelete()
+        self.assertEquals(10, TestModelTwo.objects.count())
+        self.assertEquals(1, TestModelSoftDelete.objects.count())
+
+    def test_resolution_is_memoized(self):
+        TestModelTwo.objects.filter(tmo=self.tmo1).delete()
+        with changeset_context():
+            with CaptureQueriesContext(connection) as first:
+                _determine_change_set(self.tmo1)
+            with CaptureQueriesContext(connection) as second:
+                cs = _determine_change_set(self.tmo1)
+        self.assertTrue(len(first) > 0)
+        self.assertEquals(0, len(second))
+        self.assertEquals(cs, _determine_change_set(self.tmo1))
+
+    def test_decorator(self):
+        @changeset_context()
+        def delete_all():
+            for obj in TestModelTwo.objects.filter(tmo=self.tmo1):
+                obj.delete()
+        delete_all()
+        self.assertEquals(5, ChangeSet.objects.count())
+        self.assertIsNone(_changeset_scope.get())
+
+class WriteModeTest(BaseTest):
+    def setUp(self):
+        super(WriteModeTest, self).setUp()
+        self.saved = []
+        models.signals.post_save.connect(self.post_save, sender=TestModelOne)
+
+    def tearDown(self):
+        models.signals.post_save.disconnect(self.post_save, sender=TestModelOne)
+        TestModelOne.softdelete_write_mode = SoftDeleteObject.WRITE_SAVE
+
+    def post_save(self, sender, update_fields=None, **kwargs):
+        self.saved.append(update_fields)
+
+    def _delete_and_undelete(self):
+        self.tmo1.extra_bool = False
+        with CaptureQueriesContext(connection) as queries:
+            self.tmo1.delete()
+        self.assertTrue(TestModelOne.objects.all_with_deleted().get(
+            pk=self.tmo1.pk).deleted)
+        self.tmo1.undelete()
+        self.assertFalse(TestModelOne.objects.get(pk=self.tmo1.pk).deleted)
+        return [q['sql'] for q in queries.captured_queries
+                if q['sql'].startswith('UPDATE "test_softdelete_app_testmodelone"')]
+
+    def test_save(self):
+        updates = self._delete_and_undelete()
+        self.assertIn('extra_bool', updates[0])
+        self.assertTrue(self.saved)
+        self.assertEquals(set([None]), set(self.saved))
+
+    def test_update_fields(self):
+        TestModelOne.softdelete_write_mode = SoftDeleteObject.WRITE_UPDATE_FIELDS
+        updates = self._delete_and_undelete()
+        self.assertNotIn('extra_bool', updates[0])
+        self.assertTrue(self.saved)
+        self.assertEquals(set([frozenset(['deleted_at'])]), set(self.saved))
+        self.assertTrue(TestModelOne.objects.get(pk=self.tmo1.pk).extra_bool)
+
+    def test_update(self):
+        TestModelOne.softdelete_write_mode = SoftDeleteObject.WRITE_UPDATE
+        updates = self._delete_and_undelete()
+        self.assertNotIn('extra_bool', updates[0])
+        self.assertEquals([], self.saved)
+
+    def test_cascaded_children_are_saved(self):
+        saved = []
+
+        def post_save(sender, instance, **kwargs):
+            saved.append(instance.deleted_at is not None)
+        models.signals.post_save.connect(post_save, sender=TestModelTwo)
+        try:
+            self.tmo1.delete()
+        finally:
+            models.signals.post_save.disconnect(post_save, sender=TestModelTwo)
+        self.assertEquals([True] * 5, saved)
+        self.assertEquals(5, TestModelTwo.objects.count())
+        self.assertEquals(56, ChangeSet.objects.get().record_count)
+
+class LiveIndexTest(TestCase):
+    def test_index(self):
+        from softdelete.indexes import LIVE_ROWS, LiveIndex
+        index = TestModelTwo._meta.indexes[0]
+        self.assertTrue(index.name.endswith('_liv'))
+        self.assertEquals(LIVE_ROWS, index.condition)
+        path, args, kwargs = index.deconstruct()
+        self.assertEquals('django.db.models.Index', path)
+        self.assertEquals(LIVE_ROWS, kwargs['condition'])
+        index = LiveIndex(fields=['extra_int'], condition=models.Q(extra_int=1))
+        self.assertIn(('deleted_at__isnull', True), index.condition.children)
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, TestModelTwo._meta.db_table)
+        self.assertIn(TestModelTwo._meta.indexes[0].name, constraints)
+
+    @isolate_apps('softdelete.test_softdelete_app', kwarg_name='apps')
+    def test_check(self, apps):
+        from softdelete.checks import check_live_indexes
+        from softdelete.indexes import LiveIndex
+
+        class Unindexed(SoftDeleteObject):
+            softdelete_lookup_fields = ('code', 'name')
+            code = models.IntegerField()
+            name = models.CharField(max_length=10)
+
+            class Meta:
+                app_label = 'test_softdelete_app'
+                indexes = [models.Index(fields=['name', 'deleted_at'])]
+
+        class Indexed(SoftDeleteObject):
+            softdelete_lookup_fields = ('code',)
+            code = models.IntegerField()
+
+            class Meta:
+                app_label = 'test_softdelete_app'
+                indexes = [LiveIndex(fields=['code'])]
+
+        app_config = apps.get_app_config('test_softdelete_app')
+        warnings = check_live_indexes([app_config])
+        self.assertEquals(1, len(warnings))
+        self.assertEquals('softdelete.W001', warnings[0].id)
+        self.assertIs(Unindexed, warnings[0].obj)
+
+class PurgeTest(BaseTest):
+    def _age(self, model, days):
+        model._base_manager.filter(deleted_at__isnull=False).update(
+            deleted_at=timezone.now() - datetime.timedelta(days=days))
+
+    def test_purge(self):
+        from softdelete.purge import purge_deleted
+        self.tmo1.delete()
+        self._age(TestModelOne, 40)
+        self._age(TestModelTwo, 40)
+        self._age(TestModelThrough, 10)
+        calls = []
+        self.assertEquals(5, purge_deleted(TestModelTwo,
+                                           datetime.timedelta(days=30),
+                                           dry_run=True))
+        self.assertEquals(10, TestModelTwo.objects.all_with_deleted().count())
+        purged = purge_deleted(TestModelTwo, datetime.timedelta(days=30),
+                               chunk_size=2,
+                               progress=lambda m, n: calls.append(n))
+        self.assertEquals(5, purged)
+        self.assertEquals([2, 4, 5], calls)
+        self.assertEquals(5, TestModelTwo.objects.all_with_deleted().count())
+        self.assertEquals(51, SoftDeleteRecord.objects.count())
+        self.assertEquals(0, purge_deleted(TestModelThrough,
+                                           datetime.timedelta(days=30)))
+        self.assertEquals(1, ChangeSet.objects.count())
+
+    def test_purge_removes_empty_changesets(self):
+        from softdelete.purge import purge_deleted
+        TestModelTwo.objects.filter(tmo=self.tmo2).delete()
+        self._age(TestModelTwo, 40)
+        self.assertEquals(5, ChangeSet.objects.count())
+        purge_deleted(TestModelTwo, datetime.timedelta(days=30))
+        self.assertEquals(0, ChangeSet.objects.count())
+        self.assertEquals(0, SoftDeleteRecord.objects.count())
+        self.assertEquals(5, TestModelTwo.objects.all_with_deleted().count())
+
+    def test_purge_cascaded_records(self):
+        from softdelete.purge import purge_deleted
+        self.tmo1.delete()
+        self._age(TestModelOne, 40)
+        self.assertEquals(1, purge_deleted(TestModelOne,
+                                           datetime.timedelta(days=30)))
+        # The children on_delete removed with it take their records along.
+        self.assertEquals(5, TestModelTwo.objects.all_with_deleted().count())
+        self.assertEquals(0, SoftDeleteRecord.objects.count())
+        self.assertEquals(0, ChangeSet.objects.count())
+
+    def test_undelete_after_root_purged(self):
+        self.tmo1.delete()
+        cs = ChangeSet.objects.get()
+        with changeset_context(changeset=cs):
+            self.tmo2.delete()
+        TestModelOne.objects.all_with_deleted().get(pk=self.tmo1.pk).delete()
+        cs = ChangeSet.objects.get()
+        cs.undelete()
+        self.assertEquals([self.tmo2.pk], list(
+            TestModelOne.objects.values_list('pk', flat=True)))
+        self.assertEquals(5, TestModelTwo.objects.count())
+        self.assertEquals(50, TestModelThrough.objects.count())
+        self.assertEquals(0, ChangeSet.objects.count())
+
+    def test_command(self):
+        self.tmo1.delete()
+        self._age(TestModelTwo, 40)
+        out = StringIO()
+        call_command('softdelete_purge', 'test_softdelete_app.TestModelTwo',
+                     days=30, dry_run=True, stdout=out)
+        self.assertIn('test_softdelete_app.TestModelTwo: 5 would be purged',
+                      out.getvalue())
+        call_command('softdelete_purge', days=30, stdout=out)
+        self.assertIn('test_softdelete_app.TestModelTwo: 5 purged',
+                      out.getvalue())
+        self.assertIn('test_softdelete_app.TestModelOne: 0 purged',
+                      out.getvalue())
+        self.assertEquals(5, TestModelTwo.objects.all_with_deleted().count())
+        with self.assertRaises(CommandError):
+            call_command('softdelete_purge', 'auth.User', days=30)
+
+class WithContentTest(BaseTest):
+    def test_records(self):
+        self.tmo1.delete()
+        with self.assertNumQueries(4):
+            records = list(SoftDeleteRecord.objects.with_content())
+        self.assertEquals(56, len(records))
+        with self.assertNumQueries(0):
+            contents = [r.content for r in records]
+            [str(r) for r in records]
+        self.assertIn(self.tmo1, contents)
+        self.assertTrue(all(c.deleted for c in contents))
+
+    def test_changesets(self):
+        self.tmo1.delete()
+        self.tmo_soft_delete_cascade.delete()
+        with self.assertNumQueries(3):
+            changesets = list(ChangeSet.objects.with_content())
+            [str(cs) for cs in changesets]
+        self.assertEquals(set([self.tmo1, self.tmo_soft_delete_cascade]),
+                          set(cs.content for cs in changesets))
+
+    def test_missing_content(self):
+        tmo = TestModelOne.objects.create()
+        tmo.delete()
+        TestModelOne.objects.all_with_deleted().filter(pk=tmo.pk)._raw_delete('default')
+        cs = ChangeSet.objects.with_content().get()
+        self.assertRaises(ObjectDoesNotExist, cs.get_content)
+
+class RecordCountTest(BaseTest):
+    def test_delete(self):
+        self.tmo1.delete()
+        cs = ChangeSet.objects.get()
+        self.assertEquals(56, cs.record_count)
+        self.assertEquals({TestModelOne: 1, TestModelTwo: 5,
+                           TestModelThrough: 50}, cs.get_record_counts())
+
+    def test_rerun_is_not_counted_twice(self):
+        from softdelete.cascade import CascadePlan
+        self.tmo1.delete()
+        cs = ChangeSet.objects.get()
+        CascadePlan(TestModelOne, [self.tmo1.pk], changeset=cs).execute(cs)
+        self.assertEquals(56, ChangeSet.objects.get().record_count)
+
+    def test_stale_instance_is_not_counted_twice(self):
+        from softdelete.purge import purge_deleted
+        stale = TestModelOne.objects.get(pk=self.tmo1.pk)
+        self.tmo1.delete()
+        stale.delete()
+        cs = ChangeSet.objects.get()
+        self.assertEquals(56, cs.record_count)
+        self.assertEquals(56, cs.soft_delete_records.count())
+        purge_deleted(TestModelOne, datetime.timedelta(0))
+        self.assertEquals(0, ChangeSet.objects.count())
+
+    def test_bulk_delete_and_undelete(self):
+        cs = TestModelOne.objects.all().delete(bulk=True, chunk_size=7)
+        self.assertEquals(112, cs.record_count)
+        self.assertEquals(cs.soft_delete_records.count(),
+                          ChangeSet.objects.get().record_count)
+        counts = []
+
+        def on_chunk(model, pks):
+            counts.append(ChangeSet.objects.values_list(
+                'record_count', flat=True).get())
+        cs._bulk_undelete('default', 7, None, on_chunk=on_chunk)
+        self.assertEquals(112, counts[0])
+        self.assertIn(105, counts)
+        self.assertEquals(sorted(counts, reverse=True), counts)
+        self.assertEquals(0, ChangeSet.objects.count())
+
+    def test_purge(self):
+        from softdelete.purge import purge_deleted
+        self.tmo1.delete()
+        purge_deleted(TestModelTwo, datetime.timedelta(0))
+        cs = ChangeSet.objects.get()
+        self.assertEquals(51, cs.record_count)
+        self.assertEquals({TestModelOne: 1, TestModelThrough: 50},
+                          cs.get_record_counts())
+        purge_deleted(TestModelThrough, datetime.timedelta(0))
+        purge_deleted(TestModelOne, datetime.timedelta(0))
+        self.assertEquals(0, ChangeSet.objects.count())
+
+    def test_purge_updates_counters_at_once(self):
+        from softdelete.purge import purge_deleted
+        for tmt in self.tmo2.tmts.all()[:3]:
+            with changeset_context(changeset=ChangeSet.objects.create(
+                    content_type=ContentType.objects.get_for_model(self.tmo2),
+                    object_id=str(self.tmo2.pk))):
+                tmt.delete()
+        TestModelTwo.objects.filter(tmo=self.tmo1).delete()
+        with CaptureQueriesContext(connection) as queries:
+            purge_deleted(TestModelTwo, datetime.timedelta(0))
+        self.assertEquals(1, len([
+            q for q in queries.captured_queries
+            if q['sql'].startswith('UPDATE "softdelete_changeset"')]))
+        self.assertEquals(0, ChangeSet.objects.count())
+
+
+@mock.patch('softdelete.models.SOFTDELETE_TYPED_OBJECT_IDS', True)
+class TypedObjectIdTest(BaseTest):
+    def test_delete_and_undelete(self):
+        self.tmo1.delete()
+        cs = ChangeSet.objects.get()
+        self.assertEquals(self.tmo1.pk, cs.object_id_int)
+        self.assertEquals(0, cs.soft_delete_records.filter(
+            object_id_int__isnull=True).count())
+        self.assertEquals(self.tmo1.pk, cs.soft_delete_records.get(
+            content_type=ContentType.objects.get_for_model(TestModelOne)
+        ).object_id_int)
+        self.assertEquals(cs, _determine_change_set(self.tmo1, create=False))
+        cs.undelete()
+        self.assertEquals(5, TestModelOne.objects.get(pk=self.tmo1.pk)
+                          .tmts.count())
+        self.assertEquals(0, ChangeSet.objects.count())
+
+    def test_bulk_delete_and_undelete(self):
+        cs = TestModelOne.objects.all().delete(bulk=True, chunk_size=7)
+        self.assertEquals(cs.record_count, cs.soft_delete_records.filter(
+            object_id_int__isnull=False).count())
+        recorded = str(_recorded_pks(cs, TestModelTwo).query)
+        self.assertIn('object_id_int', recorded)
+        self.assertNotIn('CAST', recorded)
+        TestModelOne.objects.all_with_deleted().undelete(bulk=True)
+        self.assertEquals(2, TestModelOne.objects.count())
+        self.assertEquals(100, TestModelThrough.objects.count())
+
+    def test_purge(self):
+        from softdelete.purge import purge_deleted
+        self.tmo1.delete()
+        purge_deleted(TestModelOne, datetime.timedelta(0))
+        self.assertEquals(0, SoftDeleteRecord.objects.filter(
+            content_type=ContentType.objects.get_for_model(TestModelOne)
+        ).count())
+
+    def test_uuid(self):
+        parent = TestModelUUID.objects.create()
+        children = [TestModelUUIDChild.objects.create(parent=parent)
+                    for x in range(3)]
+        parent.delete()
+        cs = ChangeSet.objects.get()
+        self.assertEquals(parent.pk, cs.object_id_uuid)
+        self.assertEquals(set(c.pk for c in children), set(
+            cs.soft_delete_records.filter(
+                object_id_uuid__isnull=False
+            ).exclude(object_id_uuid=parent.pk).values_list(
+                'object_id_uuid', flat=True)))
+        self.assertEquals(0, TestModelUUIDChild.objects.count())
+        TestModelUUID.objects.all_with_deleted().undelete()
+        self.assertEquals(3, TestModelUUIDChild.objects.count())
+
+    def test_backfill(self):
+        with mock.patch('softdelete.models.SOFTDELETE_TYPED_OBJECT_IDS',
+                        False):
+            self.tmo1.delete()
+        self.assertEquals(56, SoftDeleteRecord.objects.filter(
+            object_id_int__isnull=True).count())
+        out = StringIO()
+        call_command('softdelete_backfill_object_ids', 'test_softdelete_app.TestModelOne',
+                     'test_softdelete_app.TestModelThrough',
+                     chunk_size=7, stdout=out)
+        self.assertIn('test_softdelete_app.TestModelOne: 2 rows filled in',
+                      out.getvalue())
+        self.assertIn('test_softdelete_app.TestModelThrough: 50 rows filled in',
+                      out.getvalue())
+        self.assertEquals(5, SoftDeleteRecord.objects.filter(
+            object_id_int__isnull=True).count())
+        call_command('softdelete_backfill_object_ids', stdout=StringIO())
+        self.assertEquals(0, SoftDeleteRecord.objects.filter(
+            object_id_int__isnull=True).count())
+        self.assertEquals(self.tmo1.pk,
+                          ChangeSet.objects.get().object_id_int)
+        ChangeSet.objects.get().undelete()
+        self.assertEquals(2, TestModelOne.objects.count())
+
+    def test_backfill_rejects_other_keys(self):
+        self.assertRaises(CommandError, call_command,
+                          'softdelete_backfill_object_ids', 'auth.Permission',
+                          'test_softdelete_app.Missing')
+
+
+class ManagerTest(BaseTest):
+    def test_querysets(self):
+        self.tmo1.delete()
+        for qs in (TestModelOne.objects.all(),
+                   TestModelOne.objects.filter(extra_bool=False),
+                   TestModelOne.objects.all_with_deleted(),
+                   TestModelOne.objects.deleted_set(),
+                   self.tmo2.tmts.all(),
+                   self.tmo2.tmts.all_with_deleted()):
+            self.assertEquals(SoftDeleteQuerySet, type(qs))
+        self.assertEquals([self.tmo2], list(TestModelOne.objects.all()))
+        self.assertEquals(self.tmo2, TestModelOne.objects.get())
+        self.assertEquals(2, TestModelOne.objects.all_with_deleted().count())
+        self.assertEquals(5, self.tmo1.tmts.all_with_deleted().count())
+        self.assertRaises(TestModelOne.DoesNotExist, TestModelOne.objects.get,
+                          pk=self.tmo1.pk)
+
+    def test_delete_is_queryset_only(self):
+        self.assertFalse(hasattr(TestModelOne.objects, 'delete'))
+        self.assertFalse(hasattr(TestModelOne.objects, 'undelete'))
+        self.assertFalse(hasattr(TestModelOne.objects, 'adelete'))
+
+
+class SubqueryCascadeTest(BaseTest):
+    def test_delete(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.tmo1.delete(cascade_executor=CASCADE_SUBQUERY)
+        self.assertEquals(5, TestModelTwo.objects.count())
+        self.assertEquals(50, TestModelThrough.objects.count())
+        cs = ChangeSet.objects.get()
+        self.assertEquals(56, cs.record_count)
+        self.assertEquals(56, cs.soft_delete_records.count())
+        self.assertEquals({TestModelOne: 1, TestModelTwo: 5,
+                           TestModelThrough: 50}, cs.get_record_counts())
+        # Children are only ever read inside INSERT ... SELECT and UPDATE.
+        self.assertEquals([], [q['sql'] for q in queries.captured_queries
+                               if q['sql'].startswith('SELECT')
+                               and 'testmodelthrough' in q['sql']])
+        cs.undelete()
+        self.assertEquals(10, TestModelTwo.objects.count())
+        self.assertEquals(100, TestModelThrough.objects.count())
+
+    def test_bulk_delete(self):
+        with mock.patch('softdelete.cascade.SOFTDELETE_CASCADE_EXECUTOR',
+                        CASCADE_SUBQUERY):
+            cs = TestModelOne.objects.all().delete(bulk=True, chunk_size=1)
+        self.assertEquals(1, ChangeSet.objects.count())
+        self.assertEquals(112, SoftDeleteRecord.objects.count())
+        self.assertEquals(112, ChangeSet.objects.get().record_count)
+        self.assertEquals(0, TestModelThrough.objects.count())
+        cs.undelete(bulk=True)
+        self.assertEquals(100, TestModelThrough.objects.count())
+
+    def test_shared_changeset(self):
+        self.tmo1.delete(force_policy=SoftDeleteObject.SOFT_DELETE)
+        cs = ChangeSet.objects.get()
+        with changeset_context(changeset=cs):
+            self.tmo2.delete(cascade_executor=CASCADE_SUBQUERY)
+        # Only the cascade of tmo2 is soft deleted, not tmo1's children.
+        self.assertEquals(5, TestModelTwo.objects.count())
+        self.assertEquals(50, TestModelThrough.objects.count())
+        self.assertEquals(57, ChangeSet.objects.get().record_count)
+        tmo = TestModelOne.objects.create()
+        TestModelTwo.objects.create(extra_int=1, tmo=tmo)
+        TestModelOne.objects.filter(pk=tmo.pk).delete(
+            bulk=True, changeset=cs, cascade_executor=CASCADE_SUBQUERY)
+        self.assertEquals(5, TestModelTwo.objects.count())
+        self.assertEquals(59, ChangeSet.objects.get().record_count)
+
+    def test_relation_policies(self):
+        parent = TestModelSoftDeleteOnRelationLevelParent.objects.create(
+            extra_int=1)
+        TestModelSoftDeleteOnRelationLevelChild.objects.create(parent=parent)
+        TestModelSoftDeleteOnRelationLevelSecondChild.objects.create(
+            parent=parent)
+        set_null = TestModelSoftDeleteOnRelationLevelChildSetNull.objects \
+            .create(parent=parent)
+        TestModelOneToOneRelationWithNonSoftDeleteObject.objects.create(
+            one_to_one=parent)
+        parent.delete(cascade_executor=CASCADE_SUBQUERY)
+        self.assertEquals(1, TestModelSoftDeleteOnRelationLevelChild.objects
+                          .filter(parent=parent).count())
+        self.assertEquals(0, TestModelSoftDeleteOnRelationLevelSecondChild
+                          .objects.filter(parent=parent).count())
+        self.assertEquals(None, TestModelSoftDeleteOnRelationLevelChildSetNull
+                          .objects.get(pk=set_null.pk).parent_id)
+        self.assertEquals(0, TestModelOneToOneRelationWithNonSoftDeleteObject
+                          .objects.filter(one_to_one=parent).count())
+
+    def test_fallback(self):
+        from softdelete.cascade import (CascadePlan, SubqueryCascade,
+                                        cascade_executor)
+
+        def receiver(sender, **kwargs):
+            pass
+        self.assertIsInstance(cascade_executor(
+            TestModelOne, [self.tmo1.pk], executor=CASCADE_SUBQUERY),
+            SubqueryCascade)
+        self.assertIsInstance(cascade_executor(TestModelOne, [self.tmo1.pk]),
+                              CascadePlan)
+        post_soft_delete.connect(receiver, sender=TestModelThrough)
+        try:
+            self.assertIsInstance(cascade_executor(
+                TestModelOne, [self.tmo1.pk], executor=CASCADE_SUBQUERY),
+                CascadePlan)
+        finally:
+            post_soft_delete.disconnect(receiver, sender=TestModelThrough)
+        # object_id holds str(uuid), which SQLite cannot cast a UUID to.
+        self.assertIsInstance(cascade_executor(
+            TestModelUUID, [], executor=CASCADE_SUBQUERY), CascadePlan)
+
+
+class TriggerTest(BaseTest):
+    def setUp(self):
+        super(TriggerTest, self).setUp()
+        call_command('softdelete_triggers', 'install', stdout=StringIO())
+
+    def tearDown(self):
+        call_command('softdelete_triggers', 'drop', stdout=StringIO())
+        super(TriggerTest, self).tearDown()
+
+    def _raw_delete(self, model, pk):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM %s WHERE id = %%s'
+                           % model._meta.db_table, [pk])
+
+    def test_raw_delete_soft_deletes(self):
+        self._raw_delete(TestModelOne, self.tmo1.pk)
+        self.assertEquals(1, TestModelOne.objects.count())
+        self.assertEquals(2, TestModelOne.objects.all_with_deleted().count())
+        self.assertEquals(5, TestModelTwo.objects.count())
+        self.assertEquals(50, TestModelThrough.objects.count())
+        cs = ChangeSet.objects.get()
+        self.assertEquals(self.tmo1, cs.content)
+        self.assertEquals(56, cs.record_count)
+        self.assertEquals(56, cs.soft_delete_records.count())
+        self.assertEquals({TestModelOne: 1, TestModelTwo: 5,
+                           TestModelThrough: 50}, cs.get_record_counts())
+        cs.undelete()
+        self.assertEquals(10, TestModelTwo.objects.count())
+        self.assertEquals(100, TestModelThrough.objects.count())
+        self.assertEquals(0, ChangeSet.objects.count())
+
+    def test_raw_queryset_delete(self):
+        TestModelOne.objects.all()._raw_delete(connection.alias)
+        self.assertEquals(0, TestModelOne.objects.count())
+        self.assertEquals(2, ChangeSet.objects.count())
+        self.assertEquals(0, TestModelThrough.objects.count())
+        self.assertEquals(112, SoftDeleteRecord.objects.count())
+
+    def test_relation_policies(self):
+        parent = TestModelSoftDeleteOnRelationLevelParent.objects.create(
+            extra_int=1)
+        TestModelSoftDeleteOnRelationLevelChild.objects.create(parent=parent)
+        TestModelSoftDeleteOnRelationLevelSecondChild.objects.create(
+            parent=parent)
+        set_null = TestModelSoftDeleteOnRelationLevelChildSetNull.objects \
+            .create(parent=parent)
+        TestModelOneToOneRelationWithNonSoftDeleteObject.objects.create(
+            one_to_one=parent)
+        self._raw_delete(TestModelSoftDeleteOnRelationLevelParent, parent.pk)
+        self.assertEquals(1, TestModelSoftDeleteOnRelationLevelChild.objects
+                          .filter(parent=parent).count())
+        self.assertEquals(0, TestModelSoftDeleteOnRelationLevelSecondChild
+                          .objects.filter(parent=parent).count())
+        self.assertEquals(None, TestModelSoftDeleteOnRelationLevelChildSetNull
+                          .objects.get(pk=set_null.pk).parent_id)
+        self.assertEquals(0, TestModelOneToOneRelationWithNonSoftDeleteObject
+                          .objects.filter(one_to_one=parent).count())
+
+    def test_deleted_rows_are_deleted(self):
+        self.tmo1.delete()
+        self._raw_delete(TestModelTwo, self.tmo1.tmts.all_with_deleted()[0].pk)
+        self.assertEquals(4, TestModelTwo.objects.deleted_set().count())
+
+    def test_hard_deletes_bypass_triggers(self):
+        from softdelete.purge import purge_deleted
+        parents = []
+        for extra_int in range(2):
+            parent = TestModelSoftDeleteOnRelationLevelParent.objects.create(
+                extra_int=extra_int)
+            TestModelSoftDeleteOnRelationLevelChild.objects.create(
+                parent=parent)
+            parent.delete()
+            parents.append(parent)
+        children = TestModelSoftDeleteOnRelationLevelChild.objects \
+            .all_with_deleted().filter(parent__in=parents)
+        self.assertEquals(2, children.filter(deleted_at__isnull=True).count())
+        parents[0].delete()
+        self.assertEquals(1, children.count())
+        purge_deleted(TestModelSoftDeleteOnRelationLevelParent,
+                      datetime.timedelta(0))
+        self.assertEquals(0, children.count())
+        self.assertFalse(TestModelSoftDeleteOnRelationLevelParent.objects
+                         .all_with_deleted().filter(pk=parents[1].pk).exists())
+        connection.check_constraints()
+        # Raw deletes are still turned into soft deletes.
+        self._raw_delete(TestModelOne, self.tmo1.pk)
+        self.assertEquals(2, TestModelOne.objects.all_with_deleted().count())
+
+    def test_uuid(self):
+        parent = TestModelUUID.objects.create()
+        child = TestModelUUIDChild.objects.create(parent=parent)
+        TestModelUUID.objects.all()._raw_delete(connection.alias)
+        self.assertEquals(0, TestModelUUIDChild.objects.count())
+        cs = ChangeSet.objects.get()
+        self.assertEquals(str(parent.pk), cs.object_id)
+        self.assertEquals(parent.pk, cs.object_id_uuid)
+        self.assertEquals(child, cs.soft_delete_records.get(
+            object_id_uuid=child.pk).content)
+        cs.undelete()
+        self.assertEquals(1, TestModelUUIDChild.objects.count())
+
+    def test_sql(self):
+        out = StringIO()
+        call_command('softdelete_triggers', 'install',
+                     'test_softdelete_app.TestModelTwo', sql=True, stdout=out)
+        self.assertIn('CREATE TRIGGER "softdelete_test_softdelete_app_'
+                      'testmodeltwo"', out.getvalue())
+        self.assertNotIn('testmodelone"', out.getvalue())
+
+
+class InstrumentationTest(BaseTest):
+    def setUp(self):
+        super(InstrumentationTest, self).setUp()
+        self.stats = []
+        instrumentation.add_listener(self.stats.append)
+
+    def tearDown(self):
+        instrumentation.remove_listener(self.stats.append)
+        super(InstrumentationTest, self).tearDown()
+
+    def test_delete(self):
+        self.tmo1.delete()
+        stats, = self.stats
+        self.assertEquals('delete', stats.operation)
+        self.assertEquals(TestModelOne, stats.model)
+        self.assertEquals({'test_softdelete_app.TestModelOne': 1,
+                           'test_softdelete_app.TestModelTwo': 5,
+                           'test_softdelete_app.TestModelThrough': 50},
+                          dict(stats.objects))
+        self.assertEquals(56, stats.records)
+        self.assertEquals(ChangeSet.objects.get(), stats.changeset)
+        self.assertEquals([1, 1], [level[0] for level in stats.levels])
+        self.assertTrue(stats.queries > 0)
+
+    def test_nested_operations_are_reported_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            TestModelOne.objects.all().delete()
+        stats, = self.stats
+        self.assertEquals(112, stats.records)
+        self.assertEquals(len(queries), stats.queries)
+
+    def test_undelete_and_purge(self):
+        self.tmo1.delete()
+        ChangeSet.objects.get().undelete(bulk=True)
+        self.assertEquals('undelete', self.stats[1].operation)
+        self.assertEquals(TestModelOne, self.stats[1].model)
+        self.assertEquals(56, self.stats[1].records)
+        self.assertEquals(50, self.stats[1].objects[
+            'test_softdelete_app.TestModelThrough'])
+        self.tmo2.delete()
+        from softdelete.purge import purge_deleted
+        purge_deleted(TestModelTwo, datetime.timedelta(0))
+        stats = self.stats[3]
+        self.assertEquals('purge', stats.operation)
+        self.assertEquals({'test_softdelete_app.TestModelTwo': 5},
+                          dict(stats.objects))
+        self.assertEquals(5, stats.records)
+
+    def test_signal(self):
+        instrumentation.remove_listener(self.stats.append)
+        sent = []
+
+        def receiver(sender, stats, **kwargs):
+            sent.append((sender, stats.as_dict()))
+        post_operation.connect(receiver)
+        try:
+            self.tmo2.delete()
+        finally:
+            post_operation.disconnect(receiver)
+        (sender, stats), = sent
+        self.assertEquals(TestModelOne, sender)
+        self.assertEquals('test_softdelete_app.TestModelOne', stats['model'])
+
+    def test_disabled(self):
+        instrumentation.remove_listener(self.stats.append)
+        self.assertTrue(instrumentation.operation('delete', TestModelOne)
+                        is instrumentation._disabled)
+        self.tmo1.delete()
+        self.assertEquals([], self.stats)
+
+
 class AdminTest(BaseTest):
     def test_admin(self):
         client = Client()
@@ -220,6 +1195,112 @@ class AdminTest(BaseTest):
         self.tmo1 = TestModelOne.objects.all_with_deleted().get(pk=self.tmo1.pk)
         self.assertTrue(self.tmo1.deleted)
 
+class AdminListTest(BaseTest):
+    def setUp(self):
+        super(AdminListTest, self).setUp()
+        u = User.objects.create_user(username='test-user', password='test',
+                                     email='test-user@example.com')
+        u.is_staff = True
+        u.is_superuser = True
+        u.save()
+        self.client = Client()
+        self.client.login(username='test-user', password='test')
+        self.url = '/admin/test_softdelete_app/testmodeltwo/'
+
+    def _changelist(self, **params):
+        rv = self.client.get(self.url, params)
+        self.assertEquals(rv.status_code, 200)
+        return rv.context['cl']
+
+    def test_deleted_filter(self):
+        TestModelTwo.objects.filter(tmo=self.tmo1).delete(bulk=True)
+        TestModelTwo.objects.all_with_deleted().filter(
+            tmo=self.tmo1, extra_int__lt=5).update(
+                deleted_at=timezone.now() - datetime.timedelta(days=10))
+        self.assertEquals(10, self._changelist().result_count)
+        self.assertEquals(5, self._changelist(deleted='live').result_count)
+        self.assertEquals(5, self._changelist(deleted='deleted').result_count)
+        self.assertEquals(3, self._changelist(deleted='7').result_count)
+        self.assertEquals(5, self._changelist(deleted='30').result_count)
+
+    def test_approximate_count(self):
+        from softdelete.admin import ApproximateCountPaginator
+        paginator = ApproximateCountPaginator(
+            TestModelTwo.objects.all_with_deleted().order_by('pk'), 2)
+        self.assertEquals(10, paginator.count)
+        paginator = ApproximateCountPaginator(
+            TestModelTwo.objects.all_with_deleted().order_by('pk'), 2)
+        paginator.threshold = 4
+        # No estimate outside PostgreSQL: every row is counted, so the
+        # pages past the threshold can still be browsed.
+        self.assertEquals(10, paginator.count)
+        self.assertEquals([8, 9], [x.extra_int for x in paginator.page(5)])
+
+    def _action(self, action, pks):
+        return self.client.post(self.url, {
+            'action': action,
+            '_selected_action': [str(pk) for pk in pks],
+        })
+
+    def test_actions(self):
+        pks = list(self.tmo1.tmts.values_list('pk', flat=True))
+        rv = self._action('delete_selected', pks)
+        self.assertEquals(rv.status_code, 302)
+        self.assertEquals(0, self.tmo1.tmts.count())
+        self.assertEquals(1, ChangeSet.objects.count())
+        rv = self._action('soft_undelete', pks)
+        self.assertEquals(rv.status_code, 302)
+        self.assertEquals(5, self.tmo1.tmts.count())
+        self.assertEquals(0, ChangeSet.objects.count())
+
+    @override_settings(SOFTDELETE_ADMIN_BACKGROUND_HANDLER=
+                       'softdelete.tests.test_sd.background_handler')
+    def test_background_handoff(self):
+        pks = list(self.tmo1.tmts.values_list('pk', flat=True))
+        background_calls[:] = []
+        threshold = SoftDeleteObjectAdmin.background_threshold
+        SoftDeleteObjectAdmin.background_threshold = 3
+        try:
+            self._action('delete_selected', pks)
+        finally:
+            SoftDeleteObjectAdmin.background_threshold = threshold
+        self.assertEquals(5, self.tmo1.tmts.count())
+        self.assertEquals(1, len(background_calls))
+        action, queryset = background_calls[0]
+        self.assertEquals('delete', action)
+        self.assertEquals(set(pks), set(queryset.values_list('pk', flat=True)))
+
+    @override_settings(SOFTDELETE_JOB_BACKEND='softdelete.jobs.LocalBackend')
+    def test_default_background_handler(self):
+        from softdelete.jobs import get_backend
+        backend = get_backend()
+        backend.queue = []
+        pks = list(self.tmo1.tmts.values_list('pk', flat=True))
+        threshold = SoftDeleteObjectAdmin.background_threshold
+        SoftDeleteObjectAdmin.background_threshold = 3
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                self._action('delete_selected', pks)
+            self.assertEquals(5, self.tmo1.tmts.count())
+            self.assertEquals(5, len(backend.queue))
+            backend.run_pending()
+            self.assertEquals(0, self.tmo1.tmts.count())
+            self.assertEquals(5, ChangeSet.objects.count())
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self._action('soft_undelete', pks)
+            self.assertEquals(0, self.tmo1.tmts.count())
+            backend.run_pending()
+        finally:
+            SoftDeleteObjectAdmin.background_threshold = threshold
+        self.assertEquals(5, self.tmo1.tmts.count())
+        self.assertEquals(0, ChangeSet.objects.count())
+
+background_calls = []
+
+def background_handler(action, queryset):
+    background_calls.append((action, queryset))
+
 class AuthorizationTest(BaseTest):
     def test_permission_needed(self):
         cl = Client()
@@ -282,6 +1363,172 @@ class UndeleteTest(BaseTest):
         self.assertTrue(self.pre_undelete_called)
         self.assertTrue(self.post_undelete_called)
 
+    def test_bulk_undelete(self):
+        self.pre_undelete_called = False
+        self.post_undelete_called = False
+        pre_undelete.connect(self.pre_undelete)
+        post_undelete.connect(self.post_undelete)
+        self.tmo1.delete()
+        cs = ChangeSet.objects.latest('created_date')
+        cs.undelete(bulk=True, chunk_size=7)
+        self.assertEquals(0, ChangeSet.objects.count())
+        self.assertEquals(0, SoftDeleteRecord.objects.count())
+        self.assertEquals(2, TestModelOne.objects.count())
+        self.assertEquals(10, TestModelTwo.objects.count())
+        self.assertEquals(100, TestModelThrough.objects.count())
+        self.assertTrue(self.pre_undelete_called)
+        self.assertTrue(self.post_undelete_called)
+
+    def test_bulk_undelete_restores_root_once(self):
+        restored = []
+
+        def collect(sender, instance, **kwargs):
+            restored.append(instance.pk)
+        self.tmo1.delete()
+        pre_undelete.connect(collect, sender=TestModelOne)
+        post_undelete.connect(collect, sender=TestModelOne)
+        stats = []
+        instrumentation.add_listener(stats.append)
+        try:
+            ChangeSet.objects.get().undelete(bulk=True, chunk_size=7)
+        finally:
+            instrumentation.remove_listener(stats.append)
+            pre_undelete.disconnect(collect, sender=TestModelOne)
+            post_undelete.disconnect(collect, sender=TestModelOne)
+        self.assertEquals([self.tmo1.pk, self.tmo1.pk], restored)
+        self.assertEquals(1, stats[0].objects[
+            'test_softdelete_app.TestModelOne'])
+
+    def test_bulk_queryset_undelete_batch_signals(self):
+        batches = []
+
+        def post_bulk(sender, pks, **kwargs):
+            batches.append((sender, len(pks)))
+        post_bulk_undelete.connect(post_bulk)
+        try:
+            self.tmo1.delete()
+            self.tmo2.delete()
+            TestModelOne.objects.deleted_set().undelete(
+                bulk=True, signal_mode=SIGNALS_PER_BATCH)
+        finally:
+            post_bulk_undelete.disconnect(post_bulk)
+        self.assertEquals(0, ChangeSet.objects.count())
+        self.assertEquals(0, SoftDeleteRecord.objects.count())
+        self.assertEquals(2, TestModelOne.objects.count())
+        self.assertEquals(10, TestModelTwo.objects.count())
+        self.assertIn((TestModelTwo, 5), batches)
+
+    def test_undelete_batch_signals(self):
+        batches = []
+        instances = []
+
+        def post_bulk(sender, pks, **kwargs):
+            batches.append((sender, len(pks)))
+
+        def post_instance(sender, instance, **kwargs):
+            instances.append(instance)
+        self.tmo1.delete()
+        post_bulk_undelete.connect(post_bulk)
+        post_undelete.connect(post_instance)
+        try:
+            with signal_dispatch(SIGNALS_PER_BATCH):
+                ChangeSet.objects.get().undelete()
+        finally:
+            post_bulk_undelete.disconnect(post_bulk)
+            post_undelete.disconnect(post_instance)
+        self.assertEquals([], instances)
+        self.assertEquals([(TestModelOne, 1), (TestModelTwo, 5),
+                           (TestModelThrough, 50)], batches)
+        self.assertEquals(10, TestModelTwo.objects.count())
+
+    def test_undelete_does_not_load_objects(self):
+        loaded = []
+
+        def post_init(sender, **kwargs):
+            if sender is not ContentType:
+                loaded.append(sender)
+        self.tmo1.delete()
+        cs = ChangeSet.objects.get()
+        models.signals.post_init.connect(post_init)
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                cs.undelete(chunk_size=20)
+        finally:
+            models.signals.post_init.disconnect(post_init)
+        self.assertEquals([TestModelOne], loaded)
+        self.assertEquals(10, TestModelTwo.objects.count())
+        self.assertEquals(100, TestModelThrough.objects.count())
+        # The root, then one UPDATE per model in each chunk of records:
+        # 5 TestModelTwo and 15 TestModelThrough, then 20 and 15 more.
+        self.assertEquals(5, len([q for q in queries.captured_queries
+                                  if q['sql'].startswith('UPDATE')
+                                  and 'deleted_at' in q['sql']]))
+
+    def test_undelete_loads_objects_for_receivers(self):
+        undeleted = []
+
+        def post_instance(sender, instance, **kwargs):
+            undeleted.append(instance)
+        self.tmo1.delete()
+        post_undelete.connect(post_instance, sender=TestModelTwo)
+        try:
+            ChangeSet.objects.get().undelete(chunk_size=20)
+        finally:
+            post_undelete.disconnect(post_instance, sender=TestModelTwo)
+        self.assertEquals(5, len(undeleted))
+        self.assertEquals(set([None]),
+                          set(obj.deleted_at for obj in undeleted))
+
+class AsyncTest(BaseTest):
+    async def test_adelete_and_aundelete(self):
+        await self.tmo1.adelete()
+        self.assertEquals(1, await sync_to_async(TestModelOne.objects.count)())
+        self.assertEquals(5, await sync_to_async(TestModelTwo.objects.count)())
+        self.assertEquals(
+            56, await sync_to_async(SoftDeleteRecord.objects.count)())
+        deleted = await TestModelOne.objects.adeleted_set()
+        self.assertEquals([self.tmo1.pk], [x.pk for x in deleted])
+        self.assertEquals(
+            2, len(await TestModelOne.objects.aall_with_deleted()))
+        await self.tmo1.aundelete()
+        self.assertEquals(2, await sync_to_async(TestModelOne.objects.count)())
+        self.assertEquals(10, await sync_to_async(TestModelTwo.objects.count)())
+        self.assertEquals(0, await sync_to_async(ChangeSet.objects.count)())
+
+    async def test_queryset_adelete_bulk(self):
+        cs = await TestModelOne.objects.all().adelete(bulk=True)
+        self.assertEquals(0, await sync_to_async(TestModelOne.objects.count)())
+        self.assertEquals(0, await sync_to_async(TestModelTwo.objects.count)())
+        self.assertEquals(
+            112, await sync_to_async(cs.soft_delete_records.count)())
+        await cs.aundelete(bulk=True)
+        self.assertEquals(2, await sync_to_async(TestModelOne.objects.count)())
+        self.assertEquals(
+            100, await sync_to_async(TestModelThrough.objects.count)())
+
+    async def test_adelete_chunked_commit_lock(self):
+        stale = await sync_to_async(TestModelOne.objects.get)(pk=self.tmo1.pk)
+        await self.tmo1.adelete()
+        deleted = []
+
+        def collect(sender, instance, **kwargs):
+            deleted.append(instance)
+        pre_soft_delete.connect(collect)
+        try:
+            await stale.adelete(lock=LOCK_WAIT, chunked_commit=True)
+        finally:
+            pre_soft_delete.disconnect(collect)
+        self.assertEquals([], deleted)
+        self.assertEquals(1, await sync_to_async(ChangeSet.objects.count)())
+        self.assertEquals(
+            56, await sync_to_async(SoftDeleteRecord.objects.count)())
+
+    async def test_aexecute_runs_sequentially_on_sqlite(self):
+        from softdelete.cascade import CascadePlan
+        plan = await sync_to_async(CascadePlan)(TestModelOne, [self.tmo1.pk])
+        self.assertFalse(await sync_to_async(plan._can_run_concurrently)())
+
+
 class M2MTests(BaseTest):
     def test_m2mdelete(self):
         t3 = TestModelThree.objects.all()[0]
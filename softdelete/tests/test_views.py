@@ -1,7 +1,9 @@
 from django.conf import settings
 from django.test import TestCase, Client
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import connection, models
+from django.test.utils import CaptureQueriesContext
+from softdelete.views import ChangeSetDetail, ChangeSetList
 from softdelete.test_softdelete_app.models import TestModelOne, TestModelTwo, TestModelThree
 from softdelete.models import *
 from softdelete.signals import *
@@ -85,6 +87,51 @@ class ViewTest(ViewBase):
         self.assertEquals(self.t_count, TestModelThree.objects.count())
         self.assertEquals(0, self.tmo3.tmos.count())
 
+    def test_list_pagination(self):
+        for x in range(6):
+            TestModelTwo.objects.create(extra_int=x, tmo=self.tmo1).delete()
+        ChangeSetList.paginate_by = 3
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                rv = self.client.get(reverse('softdelete.changeset.list'))
+            self.assertEquals(rv.status_code, 200)
+            first = list(rv.context['object_list'])
+            self.assertEquals(3, len(first))
+            self.assertFalse([q for q in queries.captured_queries
+                              if 'COUNT(' in q['sql']])
+            rv = self.client.get(reverse('softdelete.changeset.list'),
+                                 {'cursor': rv.context['next_cursor']})
+            second = list(rv.context['object_list'])
+            self.assertEquals(3, len(second))
+            rv = self.client.get(reverse('softdelete.changeset.list'),
+                                 {'cursor': rv.context['next_cursor']})
+            third = list(rv.context['object_list'])
+            self.assertEquals(1, len(third))
+            self.assertNotIn('next_cursor', rv.context)
+        finally:
+            ChangeSetList.paginate_by = 50
+        changesets = first + second + third
+        self.assertEquals(ChangeSet.objects.count(),
+                          len(set(cs.pk for cs in changesets)))
+        self.assertEquals(sorted(changesets, key=lambda cs: (cs.created_date, cs.pk),
+                                 reverse=True), changesets)
+
+    def test_detail_pagination(self):
+        cs = ChangeSet.objects.get()
+        ChangeSetDetail.records_paginate_by = 4
+        try:
+            url = reverse('softdelete.changeset.view', args=(cs.pk,))
+            rv = self.client.get(url)
+            self.assertEquals(rv.status_code, 200)
+            self.assertEquals(4, len(rv.context['records']))
+            rv = self.client.get(url, {'after': rv.context['next_after']})
+            self.assertEquals(4, len(rv.context['records']))
+            rv = self.client.get(url, {'after': rv.context['next_after']})
+            self.assertEquals(3, len(rv.context['records']))
+            self.assertIsNone(rv.context['next_after'])
+        finally:
+            ChangeSetDetail.records_paginate_by = 100
+
 class GroupViewTest(ViewTest):
     def __init__(self, *args, **kwargs):
         super(GroupViewTest, self).__init__(USE_SOFTDELETE_GROUP=True, *args, **kwargs)
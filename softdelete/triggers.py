@@ -0,0 +1,295 @@
+'''
+Database triggers turning DELETE statements on SoftDeleteObject tables into
+soft deletes, for writes that do not go through the models: raw SQL, other
+applications sharing the database, QuerySet._raw_delete().
+
+A trigger fires before the delete of every live row. It stamps deleted_at
+and records the row in a ChangeSet, like SoftDeleteObject.delete(), then
+cascades by running the same DELETE on the related tables, whose triggers
+soft delete those rows in turn: the whole cascade runs set-based inside
+the database. The delete of the row itself is then cancelled. Rows that
+are already soft deleted are deleted for real, as a second delete() is.
+
+Deletes run inside hard_deletes() are left alone by the triggers. The
+hard deletes of the library, a second delete() and purge_deleted(), use it
+for the live rows their on_delete cascades remove; deletes of other models
+whose on_delete cascades reach SoftDeleteObject tables must use it too.
+
+Triggers are installed with the softdelete_triggers management command,
+on PostgreSQL (PL/pgSQL functions) and SQLite.
+'''
+from __future__ import unicode_literals
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db import NotSupportedError, connections, transaction
+from django.db.backends.utils import truncate_name
+
+from softdelete.cascade import (_soft_deletes, get_cascade_relations,
+                                 reachable_models)
+from softdelete.models import (ChangeSet, SoftDeleteObject, SoftDeleteRecord,
+                               _typed_object_id_field)
+
+# The ChangeSet of the cascade being soft deleted, so that the triggers of
+# the related tables record their rows in it: a transaction-local setting
+# on PostgreSQL, a one-row table on SQLite.
+PG_CHANGESET_SETTING = 'softdelete.changeset'
+SQLITE_SCOPE_TABLE = 'softdelete_trigger_scope'
+
+# Set while the triggers must let deletes through: a transaction-local
+# setting on PostgreSQL, a table holding a row on SQLite.
+PG_BYPASS_SETTING = 'softdelete.bypass'
+SQLITE_BYPASS_TABLE = 'softdelete_trigger_bypass'
+
+_bypassed = ContextVar('softdelete_trigger_bypass', default=frozenset())
+
+
+@contextmanager
+def hard_deletes(using='default'):
+    '''
+    Run the block in a transaction in which the triggers on ``using`` do not
+    turn deletes into soft deletes. On SQLite, this is a no-op until the
+    triggers were installed.
+    '''
+    connection = connections[using]
+    if using in _bypassed.get() or connection.vendor not in ('postgresql',
+                                                              'sqlite'):
+        yield
+        return
+    token = _bypassed.set(_bypassed.get() | {using})
+    try:
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute("SELECT set_config(%s, 'on', true)",
+                               [PG_BYPASS_SETTING])
+                yield
+                cursor.execute("SELECT set_config(%s, '', true)",
+                               [PG_BYPASS_SETTING])
+                return
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                           "AND name = %s", [SQLITE_BYPASS_TABLE])
+            if cursor.fetchone() is None:
+                yield
+                return
+            table = connection.ops.quote_name(SQLITE_BYPASS_TABLE)
+            cursor.execute('INSERT INTO %s DEFAULT VALUES' % table)
+            yield
+            cursor.execute('DELETE FROM %s' % table)
+    finally:
+        _bypassed.reset(token)
+
+
+def triggered_models(models=None):
+    '''
+    ``models``, every SoftDeleteObject model by default, and every
+    SoftDeleteObject model their cascades reach, which needs a trigger too.
+    '''
+    if models is None:
+        models = [m for m in apps.get_models()
+                  if issubclass(m, SoftDeleteObject)]
+    return reachable_models(models)
+
+
+class _TriggerSQL(object):
+    '''The statements installing or dropping the trigger of ``model``.'''
+
+    def __init__(self, model, connection):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            raise NotSupportedError(
+                'Soft delete triggers are not supported on %s.'
+                % connection.vendor)
+        self.model = model
+        self.connection = connection
+        qn = self.qn = connection.ops.quote_name
+        max_length = connection.ops.max_name_length()
+        self.table = qn(model._meta.db_table)
+        self.pk = qn(model._meta.pk.column)
+        self.trigger = qn(truncate_name(
+            'softdelete_%s' % model._meta.db_table, max_length))
+        self.function = qn(truncate_name(
+            'softdelete_%s_fn' % model._meta.db_table, max_length))
+        self.content_type_id = ContentType.objects.db_manager(
+            connection.alias).get_for_model(model).pk
+        self.typed = _typed_object_id_field(model)
+
+    def format(self, sql, **kwargs):
+        typed = self.typed and ', %s' % self.qn(self.typed) or ''
+        return sql.format(
+            table=self.table,
+            pk=self.pk,
+            trigger=self.trigger,
+            function=self.function,
+            ct=self.content_type_id,
+            changeset_table=self.qn(ChangeSet._meta.db_table),
+            record_table=self.qn(SoftDeleteRecord._meta.db_table),
+            typed=typed,
+            typed_value=typed and ', OLD.%s' % self.pk,
+            cascade=''.join('\n    %s;' % statement
+                            for statement in self.cascade()),
+            **kwargs)
+
+    def cascade(self):
+        '''Statements applying the relation policies to the related rows.'''
+        if self.model.softdelete_policy != SoftDeleteObject.SOFT_DELETE_CASCADE:
+            return []
+        qn = self.qn
+        statements = []
+        for relation in get_cascade_relations(self.model):
+            if relation.policy == SoftDeleteObject.DO_NOTHING:
+                continue
+            field = relation.related_model._meta.get_field(relation.field_name)
+            args = (qn(relation.related_model._meta.db_table),
+                    qn(field.column), qn(field.target_field.column))
+            if relation.policy == SoftDeleteObject.SET_NULL:
+                statements.append('UPDATE %s SET %s = NULL WHERE %s = OLD.%s'
+                                  % (args[0], args[1], args[1], args[2]))
+            elif relation.is_softdelete:
+                if not _soft_deletes(relation.related_model.softdelete_policy):
+                    # Left alone, as delete() on each of them would.
+                    continue
+                statements.append('DELETE FROM %s WHERE %s = OLD.%s '
+                                  'AND deleted_at IS NULL' % args)
+            else:
+                statements.append('DELETE FROM %s WHERE %s = OLD.%s' % args)
+        return statements
+
+    def install(self):
+        if self.connection.vendor == 'postgresql':
+            return self.postgresql()
+        return self.sqlite()
+
+    def drop(self):
+        if self.connection.vendor == 'postgresql':
+            return [
+                self.format('DROP TRIGGER IF EXISTS {trigger} ON {table}'),
+                self.format('DROP FUNCTION IF EXISTS {function}()'),
+            ]
+        return [self.format('DROP TRIGGER IF EXISTS {trigger}')]
+
+    def postgresql(self):
+        return [self.format('''
+CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+DECLARE
+    cs_id integer := NULLIF(current_setting('{setting}', true), '')::integer;
+    root boolean := cs_id IS NULL;
+BEGIN
+    IF root THEN
+        INSERT INTO {changeset_table} (created_date, content_type_id,
+            object_id{typed}, status, operation, processed, record_count,
+            record_counts)
+        VALUES (now(), {ct}, OLD.{pk}::text{typed_value}, 'done', '', 0, 0,
+                '{{}}')
+        RETURNING id INTO cs_id;
+        PERFORM set_config('{setting}', cs_id::text, true);
+    END IF;
+    UPDATE {table} SET deleted_at = now() WHERE {pk} = OLD.{pk};
+    INSERT INTO {record_table} (changeset_id, created_date, content_type_id,
+        object_id{typed})
+    VALUES (cs_id, now(), {ct}, OLD.{pk}::text{typed_value})
+    ON CONFLICT DO NOTHING;
+    UPDATE {changeset_table} SET record_count = record_count + 1,
+        record_counts = jsonb_set(record_counts, '{{{ct}}}', to_jsonb(
+            COALESCE((record_counts->>'{ct}')::integer, 0) + 1))
+    WHERE id = cs_id;{cascade}
+    IF root THEN
+        PERFORM set_config('{setting}', '', true);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql''', setting=PG_CHANGESET_SETTING),
+            self.format('DROP TRIGGER IF EXISTS {trigger} ON {table}'),
+            self.format('''
+CREATE TRIGGER {trigger} BEFORE DELETE ON {table}
+FOR EACH ROW WHEN (OLD.deleted_at IS NULL
+                   AND COALESCE(current_setting('{bypass}', true), '') <> 'on')
+EXECUTE PROCEDURE {function}()''', bypass=PG_BYPASS_SETTING),
+        ]
+
+    def sqlite(self):
+        pk_field = self.model._meta.pk
+        while pk_field.is_relation:
+            pk_field = pk_field.target_field
+        if pk_field.get_internal_type() == 'UUIDField':
+            # Stored as 32 hex digits, while object_id holds str(uuid).
+            text = "lower(%s)" % " || '-' || ".join(
+                'substr(OLD.%s, %s, %s)' % (self.pk, start, length)
+                for start, length in ((1, 8), (9, 4), (13, 4), (17, 4),
+                                      (21, 12)))
+        else:
+            text = 'CAST(OLD.%s AS TEXT)' % self.pk
+        scope = self.qn(SQLITE_SCOPE_TABLE)
+        bypass = self.qn(SQLITE_BYPASS_TABLE)
+        return [
+            '''
+CREATE TABLE IF NOT EXISTS %s (
+    changeset_id integer NOT NULL,
+    content_type_id integer NOT NULL,
+    object_id varchar(100) NOT NULL
+)''' % scope,
+            'CREATE TABLE IF NOT EXISTS %s (id integer PRIMARY KEY)' % bypass,
+            self.format('DROP TRIGGER IF EXISTS {trigger}'),
+            self.format('''
+CREATE TRIGGER {trigger} BEFORE DELETE ON {table}
+FOR EACH ROW WHEN OLD.deleted_at IS NULL
+    AND NOT EXISTS (SELECT 1 FROM {bypass})
+BEGIN
+    INSERT INTO {changeset_table} (created_date, content_type_id,
+        object_id{typed}, status, operation, processed, record_count,
+        record_counts)
+    SELECT {now}, {ct}, {text}{typed_value}, 'done', '', 0, 0, '{{}}'
+    WHERE NOT EXISTS (SELECT 1 FROM {scope});
+    INSERT INTO {scope} (changeset_id, content_type_id, object_id)
+    SELECT last_insert_rowid(), {ct}, {text}
+    WHERE NOT EXISTS (SELECT 1 FROM {scope});
+    UPDATE {table} SET deleted_at = {now} WHERE {pk} = OLD.{pk};
+    INSERT OR IGNORE INTO {record_table} (changeset_id, created_date,
+        content_type_id, object_id{typed})
+    SELECT changeset_id, {now}, {ct}, {text}{typed_value} FROM {scope};
+    UPDATE {changeset_table} SET record_count = record_count + 1,
+        record_counts = json_set(record_counts, '$."{ct}"', COALESCE(
+            json_extract(record_counts, '$."{ct}"'), 0) + 1)
+    WHERE id = (SELECT changeset_id FROM {scope});{cascade}
+    DELETE FROM {scope} WHERE content_type_id = {ct} AND object_id = {text};
+    SELECT RAISE(IGNORE);
+END''', scope=scope, bypass=bypass, text=text,
+                now="strftime('%Y-%m-%d %H:%M:%f', 'now')"),
+        ]
+
+
+def trigger_sql(model, using='default'):
+    '''The statements installing the trigger of ``model`` on ``using``.'''
+    return _TriggerSQL(model, connections[using]).install()
+
+
+def drop_trigger_sql(model, using='default'):
+    '''The statements dropping the trigger of ``model`` from ``using``.'''
+    return _TriggerSQL(model, connections[using]).drop()
+
+
+def _execute(statements, using):
+    with transaction.atomic(using=using), \
+            connections[using].cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def install_triggers(models=None, using='default'):
+    '''
+    Install the triggers of ``models`` and of the models their cascades
+    reach, see triggered_models(), and return those models.
+    '''
+    models = triggered_models(models)
+    _execute([sql for model in models
+              for sql in trigger_sql(model, using)], using)
+    return models
+
+
+def drop_triggers(models=None, using='default'):
+    '''Drop the triggers of ``models``, every model by default.'''
+    models = triggered_models(models)
+    _execute([sql for model in models
+              for sql in drop_trigger_sql(model, using)], using)
+    return models
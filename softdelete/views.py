@@ -11,6 +11,8 @@ from django.views.decorators.csrf import csrf_exempt
 from django.urls import reverse
 from django.utils.decorators import method_decorator
 from django.template import RequestContext
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 from softdelete.forms import *
 from softdelete.models import *
 import logging
@@ -25,20 +27,82 @@ class ProtectedView(object):
         context['request'] = self.request
         return context
 
+def _encode_cursor(changeset):
+    return '%s_%s' % (changeset.created_date.isoformat(), changeset.pk)
+
+def _decode_cursor(cursor):
+    '''
+    Return the (created_date, pk) position encoded in ``cursor``, or None
+    if it is missing or malformed.
+    '''
+    created_date, _, pk = (cursor or '').rpartition('_')
+    try:
+        return parse_datetime(created_date), int(pk)
+    except (TypeError, ValueError):
+        return None
+
 class ChangeSetList(ProtectedView, ListView):
+    '''
+    Changesets, newest first, paginated on (created_date, pk) rather than
+    with offsets, so that neither a COUNT nor a deep OFFSET runs over the
+    whole table. ``?cursor=`` holds the position of the last changeset of
+    the previous page.
+    '''
     model = ChangeSet
-
-    def get_query_set(self):
-        return self.model.objects.all()
+    paginate_by = 50
 
     def get_queryset(self):
-        return self.model.objects.all()
+        qs = self.model.objects.order_by('-created_date', '-pk')
+        position = _decode_cursor(self.request.GET.get('cursor'))
+        if position and position[0]:
+            created_date, pk = position
+            qs = qs.filter(Q(created_date__lt=created_date) |
+                           Q(created_date=created_date, pk__lt=pk))
+        return qs
+
+    get_query_set = get_queryset
+
+    def paginate_queryset(self, queryset, page_size):
+        changesets = list(queryset.with_content()[:page_size + 1])
+        has_next = len(changesets) > page_size
+        return None, None, changesets[:page_size], has_next
+
+    def get_context_data(self, **kwargs):
+        context = super(ChangeSetList, self).get_context_data(**kwargs)
+        if context['is_paginated']:
+            context['next_cursor'] = _encode_cursor(context['object_list'][-1])
+        return context
 
 class ChangeSetDetail(ProtectedView, DetailView):
+    '''
+    A changeset and its records, ``records_paginate_by`` at a time in
+    primary key order. ``?after=`` holds the primary key of the last record
+    of the previous page.
+    '''
     model = ChangeSet
+    records_paginate_by = 100
 
     def get_object(self):
-        return get_object_or_404(ChangeSet, pk=self.kwargs['changeset_pk'])
+        return get_object_or_404(ChangeSet.objects.with_content(),
+                                 pk=self.kwargs['changeset_pk'])
+
+    def get_records(self):
+        qs = self.object.soft_delete_records.with_content().order_by('pk')
+        try:
+            qs = qs.filter(pk__gt=int(self.request.GET['after']))
+        except (KeyError, ValueError):
+            pass
+        records = list(qs[:self.records_paginate_by + 1])
+        next_after = None
+        if len(records) > self.records_paginate_by:
+            records = records[:self.records_paginate_by]
+            next_after = records[-1].pk
+        return records, next_after
+
+    def get_context_data(self, **kwargs):
+        context = super(ChangeSetDetail, self).get_context_data(**kwargs)
+        context['records'], context['next_after'] = self.get_records()
+        return context
 
 class ChangeSetUpdate(ProtectedView, UpdateView):
     model = ChangeSet